@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Auto Categorizer
+Assign (Categorie, Sous-categorie) to imported expenses from merchant rules
+compiled into a single combined regular expression.
+"""
+
+import json
+import re
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from ledger import SUBCATEGORY, load_ledger
+
+KEYWORD_GROUP = 'kw'
+RULE_COLUMN = 'Regle'
+
+
+class AutoCategorizer:
+    def __init__(self, rules_file: Optional[Path] = None):
+        self.base_dir = Path(__file__).parent.parent
+        self.rules_file = Path(rules_file) if rules_file else self.base_dir / "budget" / "category_rules.json"
+        self.rules: List[Dict] = []
+        self.learned: List[Dict] = []
+        self._pattern: Optional[re.Pattern] = None
+        self._load_rules()
+
+    def _load_rules(self):
+        """Load explicit and learned rules from the rules file."""
+        if self.rules_file.exists():
+            try:
+                with open(self.rules_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.rules = data.get('rules', [])
+                self.learned = data.get('learned', [])
+            except json.JSONDecodeError:
+                print(f"❌ Could not read {self.rules_file.name}; no rules loaded.")
+        self._pattern = None
+
+    def save_rules(self):
+        """Write explicit and learned rules back to the rules file."""
+        with open(self.rules_file, 'w', encoding='utf-8') as f:
+            json.dump({'rules': self.rules, 'learned': self.learned}, f, indent=2, ensure_ascii=False)
+
+    def learn_from_history(self, df: pd.DataFrame, min_count: int = 2, min_share: float = 0.8) -> int:
+        """Learn description -> (Categorie, Sous-categorie) rules from labelled rows.
+
+        A description becomes a rule when it was seen at least min_count
+        times and at least min_share of those rows agree on the labels.
+        """
+        if df.empty or SUBCATEGORY not in df.columns:
+            self.learned = []
+            return 0
+        labelled = df[df[SUBCATEGORY].notna() & (df[SUBCATEGORY].astype(str).str.strip() != '')]
+        keys = labelled['Description'].astype(str).str.strip().str.lower()
+        counts = labelled.groupby([keys, 'Categorie', SUBCATEGORY]).size().rename('count').reset_index()
+        counts = counts.rename(columns={'Description': 'keyword'})
+        totals = counts.groupby('keyword')['count'].transform('sum')
+        best = counts[(counts['count'] >= min_count) & (counts['count'] >= min_share * totals)]
+        self.learned = [
+            {'keywords': [keyword], 'categorie': category, 'sous_categorie': subcategory}
+            for keyword, category, subcategory in best[['keyword', 'Categorie', SUBCATEGORY]].itertuples(index=False)
+        ]
+        self._pattern = None
+        return len(self.learned)
+
+    def compile(self):
+        """Build the combined matcher.
+
+        All keywords go into one alternation (longest first, word-bounded);
+        each regex rule gets its own named group. A single search per
+        description then tells which rule fired.
+        """
+        all_rules = self.rules + self.learned
+        self._keyword_rule: Dict[str, int] = {}
+        regex_parts = []
+        for rule_id, rule in enumerate(all_rules):
+            for keyword in rule.get('keywords', []):
+                # Explicit rules win over learned ones for the same keyword
+                self._keyword_rule.setdefault(keyword.strip().lower(), rule_id)
+            if rule.get('regex'):
+                regex_parts.append(f"(?P<r{rule_id}>{rule['regex']})")
+
+        parts = []
+        if self._keyword_rule:
+            keywords = sorted(self._keyword_rule, key=len, reverse=True)
+            parts.append(rf"(?P<{KEYWORD_GROUP}>(?<!\w)(?:{'|'.join(map(re.escape, keywords))})(?!\w))")
+        parts.extend(regex_parts)
+        self._pattern = re.compile('|'.join(parts), re.IGNORECASE) if parts else None
+
+        self._rule_targets = pd.DataFrame({
+            'Categorie': [r.get('categorie') for r in all_rules] + [None],
+            SUBCATEGORY: [r.get('sous_categorie') for r in all_rules] + [None],
+        })
+        self._min_amount = np.array([r.get('min_amount') for r in all_rules] + [None], dtype=float)
+        self._max_amount = np.array([r.get('max_amount') for r in all_rules] + [None], dtype=float)
+        self._min_amount[np.isnan(self._min_amount)] = -np.inf
+        self._max_amount[np.isnan(self._max_amount)] = np.inf
+
+    def _match(self, description: str) -> int:
+        """Rule id matched by one description (-1 when none)."""
+        match = self._pattern.search(description)
+        if match is None:
+            return -1
+        if match.lastgroup == KEYWORD_GROUP:
+            return self._keyword_rule[match.group(KEYWORD_GROUP).lower()]
+        return int(match.lastgroup[1:])
+
+    def classify(self, descriptions: pd.Series, amounts: Optional[pd.Series] = None) -> pd.DataFrame:
+        """Categorie, Sous-categorie and matching rule index for a whole column.
+
+        Each distinct description is matched once; amount ranges are then
+        checked for all rows at once.
+        """
+        if self._pattern is None:
+            self.compile()
+        texts = descriptions.fillna('').astype(str)
+        codes, uniques = pd.factorize(texts)
+        if self._pattern is None:
+            rule_ids = np.full(len(texts), -1)
+        else:
+            unique_ids = np.fromiter((self._match(text) for text in uniques), dtype=np.int64, count=len(uniques))
+            rule_ids = unique_ids[codes] if len(codes) else np.empty(0, dtype=np.int64)
+
+        if amounts is not None and len(rule_ids):
+            values = pd.to_numeric(amounts, errors='coerce').to_numpy(dtype=float)
+            in_range = (values >= self._min_amount[rule_ids]) & (values <= self._max_amount[rule_ids])
+            rule_ids = np.where(in_range, rule_ids, -1)
+
+        result = self._rule_targets.iloc[rule_ids].reset_index(drop=True)
+        result.index = descriptions.index
+        result[RULE_COLUMN] = rule_ids
+        return result
+
+    def categorize(self, df: pd.DataFrame, overwrite: bool = False) -> Dict:
+        """Fill Categorie/Sous-categorie of df in place; returns match statistics."""
+        start = time.perf_counter()
+        result = self.classify(df['Description'], df['Montant'] if 'Montant' in df.columns else None)
+        elapsed = time.perf_counter() - start
+
+        matched = result[RULE_COLUMN].to_numpy() >= 0
+        for column in ('Categorie', SUBCATEGORY):
+            if column not in df.columns:
+                df[column] = None
+        # Both labels are set together so they always form a line of the tree
+        target = matched if overwrite else matched & df[SUBCATEGORY].isna().to_numpy()
+        for column in ('Categorie', SUBCATEGORY):
+            df.loc[target, column] = result.loc[target, column]
+
+        unmatched = df.loc[~matched, 'Description'].fillna('').astype(str)
+        return {
+            'rows': len(df),
+            'matched': int(matched.sum()),
+            'seconds': elapsed,
+            'rows_per_second': len(df) / elapsed if elapsed > 0 else float('inf'),
+            'unmatched': unmatched.value_counts(),
+        }
+
+    def categorize_file(self, input_file: Path, output_file: Optional[Path] = None) -> Dict:
+        """Categorize an imported statement CSV and write the result next to it."""
+        input_file = Path(input_file)
+        output_file = Path(output_file) if output_file else input_file.with_name(f"{input_file.stem}_categorized.csv")
+        df = pd.read_csv(input_file, skipinitialspace=True)
+        stats = self.categorize(df)
+        df.to_csv(output_file, index=False)
+        stats['output'] = output_file
+        return stats
+
+
+def print_stats(stats: Dict, limit: int = 10):
+    print("\n🏷️  CATEGORIZATION REPORT")
+    print("="*50)
+    rate = stats['matched'] / stats['rows'] * 100 if stats['rows'] else 0.0
+    print(f"📄 Rows: {stats['rows']}")
+    print(f"✅ Matched: {stats['matched']} ({rate:.1f}%)")
+    print(f"⚡ Throughput: {stats['rows_per_second']:,.0f} rows/s ({stats['seconds'] * 1000:.1f} ms)")
+    if not stats['unmatched'].empty:
+        print(f"\n❓ Unmatched descriptions (top {limit}):")
+        for description, count in stats['unmatched'].head(limit).items():
+            print(f"   {count:5} × {description}")
+    if 'output' in stats:
+        print(f"\n💾 Saved to {stats['output']}")
+
+
+def main():
+    categorizer = AutoCategorizer()
+
+    while True:
+        print("\n" + "="*40)
+        print("🏷️  AUTO CATEGORIZER")
+        print("="*40)
+        print("1. 📥 Categorize an import file")
+        print("2. 🧠 Learn rules from history")
+        print("3. 📋 Show rules")
+        print("4. 🚪 Exit")
+        print("="*40)
+
+        choice = input("\nSelect option (1-4): ").strip()
+
+        if choice == '1':
+            path = Path(input("Path of the CSV file to categorize: ").strip())
+            if not path.exists():
+                print(f"❌ File not found: {path}")
+            else:
+                print_stats(categorizer.categorize_file(path))
+        elif choice == '2':
+            learned = categorizer.learn_from_history(load_ledger(categorizer.base_dir))
+            categorizer.save_rules()
+            print(f"🧠 Learned {learned} rules from labelled history.")
+        elif choice == '3':
+            print(f"\n📋 {len(categorizer.rules)} rules, {len(categorizer.learned)} learned")
+            for rule in categorizer.rules:
+                pattern = ', '.join(rule.get('keywords', [])) or rule.get('regex', '')
+                print(f"   {pattern} → {rule.get('categorie')} / {rule.get('sous_categorie')}")
+        elif choice == '4':
+            print("👋 Goodbye!")
+            break
+        else:
+            print("❌ Invalid choice.")
+
+        input("\nPress Enter to continue...")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,16 +11,24 @@ from pathlib import Path
 import pandas as pd
 from typing import Dict, Optional
 
+from budget_variance import BudgetVariance
+from ledger import read_csv_cached
+from spend_forecast import SpendForecast
+from summary_store import ALL_ACCOUNTS, SummaryStore
+
 class BudgetTracker:
     def __init__(self):
         self.base_dir = Path(__file__).parent.parent
         self.expenses_file = self.base_dir / "expenses" / "expenses_working.csv"
         self.initial_budget_file = self.base_dir / "budget" / "initial_budget.json"
         self.summary_dir = self.base_dir / "summary"
+        self.summary_store = SummaryStore(self.base_dir)
         # Load fixed charges and use as category structure
         self.charges_fixes = self._load_initial_budget()
         self.categories = list(self.charges_fixes.keys())
         self.subcategories = {cat: list(sub.keys()) for cat, sub in self.charges_fixes.items()}
+        self.variance = BudgetVariance(self.base_dir)
+        self.forecast = SpendForecast(self.base_dir)
     
     def _load_initial_budget(self):
         """Load fixed charges and category structure from JSON file."""
@@ -39,7 +47,7 @@ class BudgetTracker:
         """Gather all expenses grouped by category and subcategory."""
         if not self.expenses_file.exists():
             return {}
-        df = pd.read_csv(self.expenses_file)
+        df = read_csv_cached(self.expenses_file)
         if df.empty:
             return {}
         if month:
@@ -64,18 +72,34 @@ class BudgetTracker:
         
     def save_expenses_summary(self, 
                         account: Optional[str] = None, 
-                        month: Optional[str] = None):
+                        month: Optional[str] = None,
+                        export: bool = False):
         """Save summary of expenses grouped by category and subcategory."""
         current_month = datetime.now().strftime("%Y-%m") if month is None else month
         summary = self.get_expenses_by_category(account, current_month)
 
-        # Save summary to file
-        self.summary_dir.mkdir(exist_ok=True)
-        filename = f"summary_{account or 'all'}_{current_month}.json"
-        summary_path = self.summary_dir / filename
-        with open(summary_path, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False)
-        print(f"\n📁 Summary saved to {summary_path}")
+        # Save summary to the consolidated store
+        rows = [{'Categorie': cat, 'Sous-categorie': subcat, 'Montant': amount}
+                for cat, subcats in summary.items() for subcat, amount in subcats.items()]
+        self.summary_store.replace_month(account or ALL_ACCOUNTS, current_month, rows, 'budget')
+        print(f"\n📁 Summary saved to {self.summary_store.db_file}")
+
+        # Optional per-file copy
+        if export:
+            self.summary_dir.mkdir(exist_ok=True)
+            filename = f"summary_{account or ALL_ACCOUNTS}_{current_month}.json"
+            summary_path = self.summary_dir / filename
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2, ensure_ascii=False)
+            print(f"📁 Summary exported to {summary_path}")
+
+    def variance_report(self, start: Optional[str] = None, end: Optional[str] = None):
+        """Show planned vs actual vs income for a range of months."""
+        self.variance.report(start, end)
+
+    def forecast_report(self):
+        """Show the simulated end-of-month outcome of every budget line."""
+        self.forecast.report()
 
 def main():
     tracker = BudgetTracker()
@@ -86,9 +110,11 @@ def main():
         print("="*40)
         print("1. 📊 Global expenses summary")
         print("2. 🔍 Specific account summary")
-        print("3. 🚪 Exit")
+        print("3. 📉 Budget vs actual variance")
+        print("4. 🔮 End-of-month forecast")
+        print("5. 🚪 Exit")
         print("="*40)
-        choice = input("\nSelect option (1-3): ").strip()
+        choice = input("\nSelect option (1-5): ").strip()
         if choice == '1':
             # Validate month input:
             month = input("Enter month (YYYY-MM) or leave empty for current month: ").strip()
@@ -100,7 +126,8 @@ def main():
                 except ValueError:
                     print("❌ Invalid format. Defaulting to current month.")
                     month = None
-            tracker.save_expenses_summary(month=month)
+            export = input("Also export a JSON file? (y/N): ").strip().lower() == 'y'
+            tracker.save_expenses_summary(month=month, export=export)
         elif choice == '2':
             # Validate month input:
             month = input("Enter month (YYYY-MM) or leave empty for current month: ").strip()
@@ -113,12 +140,31 @@ def main():
                     print("❌ Invalid format. Defaulting to current month.")
                     month = None
             account = input("Enter account ([Commun]/Luc/Laura): ").strip()
-            tracker.save_expenses_summary(account=account, month=month)
+            export = input("Also export a JSON file? (y/N): ").strip().lower() == 'y'
+            tracker.save_expenses_summary(account=account, month=month, export=export)
         elif choice == '3':
+            # Validate month range input:
+            months = []
+            for label in ("first", "last"):
+                month = input(f"Enter {label} month (YYYY-MM) or leave empty for all data: ").strip()
+                if month:
+                    try:
+                        datetime.strptime(month, "%Y-%m")
+                    except ValueError:
+                        print("❌ Invalid format. Using all data.")
+                        month = ""
+                months.append(month or None)
+            if months[0] and months[1] and months[0] > months[1]:
+                print("❌ The first month is after the last month.")
+            else:
+                tracker.variance_report(*months)
+        elif choice == '4':
+            tracker.forecast_report()
+        elif choice == '5':
             print("👋 Goodbye!")
             break
         else:
-            print("❌ Invalid choice. Please select a valid option (1-3).")
+            print("❌ Invalid choice. Please select a valid option (1-5).")
         
         try:    
             input("\nPress Enter to continue...")
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Budget Variance
+Planned vs actual vs income over a range of months, for every line of the
+budget tree (category / sous-catégorie) and every account, in one vectorized pass.
+"""
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+from ledger import SUBCATEGORY, load_ledger
+
+DEFAULT_SUBCATEGORY = 'autre'
+
+
+def load_budget_tree(path: Path) -> Dict[str, Dict[str, float]]:
+    """Load the two-level {category: {sous-catégorie: planned}} budget."""
+    if path.exists():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            return {}
+    return {}
+
+
+def budget_line_keys(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    """Budget line (category, sous-catégorie) of each expense row.
+
+    Names are matched case-insensitively; rows without a sous-catégorie are
+    booked to 'autre', like BudgetTracker.get_expenses_by_category does.
+    """
+    categories = df['Categorie'].astype(str).str.strip().str.lower()
+    if SUBCATEGORY in df.columns:
+        subcategories = df[SUBCATEGORY].fillna('').astype(str).str.strip().str.lower()
+        subcategories = subcategories.mask(subcategories == '', DEFAULT_SUBCATEGORY)
+    else:
+        subcategories = pd.Series(DEFAULT_SUBCATEGORY, index=df.index)
+    return categories, subcategories
+
+
+def load_income(path: Path) -> pd.DataFrame:
+    """Income rows; rows without a date are recurring monthly income."""
+    if not path.exists():
+        return pd.DataFrame(columns=['Date', 'Compte', 'Montant'])
+    df = pd.read_csv(path, skipinitialspace=True)
+    df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+    df['Montant'] = pd.to_numeric(df['Montant'], errors='coerce').fillna(0.0)
+    df['Compte'] = df['Compte'].astype(str).str.strip()
+    return df
+
+
+class BudgetVariance:
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.initial_budget_file = self.base_dir / "budget" / "initial_budget.json"
+        self.income_file = self.base_dir / "budget" / "income.csv"
+        self.summary_dir = self.base_dir / "summary"
+        self.budget = load_budget_tree(self.initial_budget_file)
+
+    def planned_lines(self) -> pd.DataFrame:
+        """Flatten the budget tree to one row per line."""
+        rows = [(cat.lower(), sub.lower(), float(amount))
+                for cat, subs in self.budget.items() for sub, amount in subs.items()]
+        return pd.DataFrame(rows, columns=['Categorie', SUBCATEGORY, 'Planned'])
+
+    def compute(self,
+                start: Optional[str] = None,
+                end: Optional[str] = None,
+                expenses: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+        """Compute the variance tables for months start..end (YYYY-MM, inclusive).
+
+        Returns {'lines': ..., 'line_accounts': ..., 'accounts': ...}:
+        planned/actual/delta/cumulative drift per month and budget line, actual
+        per month, budget line and account, and actual/income/savings rate per
+        month and account. The tables are empty when end is before start.
+        """
+        df = load_ledger(self.base_dir) if expenses is None else expenses
+        if df.empty:
+            df = df.assign(Date=pd.to_datetime(df['Date']), Montant=df['Montant'].astype(float))
+        month_index = (df['Date'].dt.year * 12 + df['Date'].dt.month - 1).to_numpy()
+
+        if start is None:
+            start = str(df['Date'].min().to_period('M')) if not df.empty else datetime.now().strftime("%Y-%m")
+        if end is None:
+            end = max(str(df['Date'].max().to_period('M')), start) if not df.empty else start
+        months = pd.period_range(start, end, freq='M')
+        if months.empty:
+            return {
+                'lines': pd.DataFrame(columns=['Month', 'Categorie', SUBCATEGORY, 'Planned', 'Actual', 'Delta', 'Drift']),
+                'line_accounts': pd.DataFrame(columns=['Month', 'Categorie', SUBCATEGORY, 'Compte', 'Actual']),
+                'accounts': pd.DataFrame(columns=['Month', 'Compte', 'Actual', 'Income', 'Savings', 'Savings rate']),
+            }
+        month_codes = month_index - (months[0].year * 12 + months[0].month - 1)
+        in_range = (month_codes >= 0) & (month_codes < len(months))
+        df, month_codes = df[in_range], month_codes[in_range]
+
+        # Budget lines: every line of the tree, plus lines only seen in the data
+        categories, subcategories = budget_line_keys(df)
+        planned = self.planned_lines()
+        observed = pd.DataFrame({'Categorie': categories, SUBCATEGORY: subcategories}).drop_duplicates()
+        lines = planned.merge(observed, on=['Categorie', SUBCATEGORY], how='outer')
+        lines['Planned'] = lines['Planned'].fillna(0.0)
+        line_index = pd.MultiIndex.from_frame(lines[['Categorie', SUBCATEGORY]])
+        line_codes = line_index.get_indexer(pd.MultiIndex.from_arrays([categories, subcategories]))
+
+        # Month x line matrices
+        n_months, n_lines = len(months), len(lines)
+        amounts = df['Montant'].to_numpy(dtype=float)
+        actual = np.bincount(month_codes * n_lines + line_codes, weights=amounts,
+                             minlength=n_months * n_lines).reshape(n_months, n_lines)
+        planned_matrix = np.broadcast_to(lines['Planned'].to_numpy(), (n_months, n_lines))
+        delta = actual - planned_matrix
+        drift = np.cumsum(delta, axis=0)
+
+        line_table = pd.DataFrame({
+            'Month': np.repeat(months.astype(str), n_lines),
+            'Categorie': np.tile(lines['Categorie'].to_numpy(), n_months),
+            SUBCATEGORY: np.tile(lines[SUBCATEGORY].to_numpy(), n_months),
+            'Planned': planned_matrix.ravel(),
+            'Actual': actual.ravel(),
+            'Delta': delta.ravel(),
+            'Drift': drift.ravel(),
+        })
+
+        # Month x line x account actuals (the plan has no account dimension)
+        income_rows = load_income(self.income_file)
+        accounts = pd.Index(sorted(set(df['Compte']) | set(income_rows['Compte'])))
+        account_codes = accounts.get_indexer(df['Compte'])
+        n_accounts = len(accounts)
+        by_account = np.bincount((month_codes * n_lines + line_codes) * n_accounts + account_codes,
+                                 weights=amounts, minlength=n_months * n_lines * n_accounts)
+        line_account_table = pd.DataFrame({
+            'Month': np.repeat(months.astype(str), n_lines * n_accounts),
+            'Categorie': np.tile(np.repeat(lines['Categorie'].to_numpy(), n_accounts), n_months),
+            SUBCATEGORY: np.tile(np.repeat(lines[SUBCATEGORY].to_numpy(), n_accounts), n_months),
+            'Compte': np.tile(accounts.to_numpy(dtype=object), n_months * n_lines),
+            'Actual': by_account,
+        })
+
+        # Month x account actuals against income
+        spent = np.bincount(month_codes * n_accounts + account_codes, weights=amounts,
+                            minlength=n_months * n_accounts).reshape(n_months, n_accounts)
+        income = self._income_matrix(income_rows, months, accounts)
+        account_table = pd.DataFrame({
+            'Month': np.repeat(months.astype(str), n_accounts + 1),
+            'Compte': np.tile(np.append(accounts.to_numpy(dtype=object), 'Total'), n_months),
+            'Actual': np.column_stack([spent, spent.sum(axis=1)]).ravel(),
+            'Income': np.column_stack([income, income.sum(axis=1)]).ravel(),
+        })
+        account_table['Savings'] = account_table['Income'] - account_table['Actual']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            account_table['Savings rate'] = np.where(account_table['Income'] > 0,
+                                                     account_table['Savings'] / account_table['Income'],
+                                                     np.nan)
+        return {'lines': line_table, 'line_accounts': line_account_table, 'accounts': account_table}
+
+    def _income_matrix(self, income: pd.DataFrame, months: pd.PeriodIndex, accounts: pd.Index) -> np.ndarray:
+        """Income per month and account: recurring rows every month plus dated rows."""
+        matrix = np.zeros((len(months), len(accounts)))
+        if income.empty:
+            return matrix
+        codes = accounts.get_indexer(income['Compte'])
+        recurring = income['Date'].isna().to_numpy()
+        matrix += np.bincount(codes[recurring], weights=income['Montant'].to_numpy()[recurring],
+                              minlength=len(accounts))
+        dated = income[~recurring]
+        if not dated.empty:
+            offsets = (dated['Date'].dt.year * 12 + dated['Date'].dt.month - 1).to_numpy() \
+                - (months[0].year * 12 + months[0].month - 1)
+            keep = (offsets >= 0) & (offsets < len(months))
+            np.add.at(matrix, (offsets[keep], codes[~recurring][keep]),
+                      dated['Montant'].to_numpy()[keep])
+        return matrix
+
+    def report(self, start: Optional[str] = None, end: Optional[str] = None, save: bool = True):
+        """Print the variance report and optionally save it as JSON."""
+        t0 = time.perf_counter()
+        tables = self.compute(start, end)
+        elapsed = time.perf_counter() - t0
+        lines, line_accounts, accounts = tables['lines'], tables['line_accounts'], tables['accounts']
+        if lines.empty:
+            print(f"\n📉 BUDGET VS ACTUAL - no months from {start} to {end}.")
+            return
+        first, last = lines['Month'].iloc[0], lines['Month'].iloc[-1]
+
+        print(f"\n📉 BUDGET VS ACTUAL - {first} → {last}")
+        print("="*60)
+        totals = lines.groupby(['Categorie', SUBCATEGORY], sort=False)[['Planned', 'Actual', 'Delta']].sum()
+        totals = totals[(totals['Planned'] != 0) | (totals['Actual'] != 0)]
+        for (category, subcategory), row in totals.iterrows():
+            flag = "⚠️ " if row['Delta'] > 0 else "  "
+            print(f"{flag} {category:12} / {subcategory:15} planned €{row['Planned']:9.2f} | "
+                  f"actual €{row['Actual']:9.2f} | drift €{row['Delta']:+9.2f}")
+
+        print("\n📂 Actual by account:")
+        by_account = line_accounts.pivot_table(values='Actual', index=['Categorie', SUBCATEGORY],
+                                               columns='Compte', aggfunc='sum', sort=False)
+        by_account = by_account[by_account.abs().sum(axis=1) > 0]
+        print(by_account.round(2).to_string() if not by_account.empty else "   No expenses.")
+
+        print("\n👥 Savings rate by account:")
+        overall = accounts.groupby('Compte', sort=False)[['Actual', 'Income', 'Savings']].sum()
+        for account, row in overall.iterrows():
+            rate = f"{row['Savings'] / row['Income'] * 100:.1f}%" if row['Income'] > 0 else "n/a"
+            print(f"   👤 {account}: spent €{row['Actual']:.2f} | income €{row['Income']:.2f} | savings rate {rate}")
+        print(f"\n⏱️  Computed in {elapsed * 1000:.1f} ms")
+
+        if save:
+            self.summary_dir.mkdir(exist_ok=True)
+            path = self.summary_dir / f"variance_{first}_{last}.json"
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'lines': json.loads(lines.to_json(orient='records')),
+                    'line_accounts': json.loads(line_accounts[line_accounts['Actual'] != 0].to_json(orient='records')),
+                    'accounts': json.loads(accounts.to_json(orient='records')),
+                }, f, indent=2, ensure_ascii=False)
+            print(f"📁 Variance report saved to {path}")
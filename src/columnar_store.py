@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Columnar Store
+Optional on-disk binary format: one fixed-width file per column, opened with
+numpy.memmap so analyses read only the pages they touch instead of parsing CSV.
+
+meta.json records the size and mtime of every source CSV the store was built
+from; when any of them changes the store is stale and readers fall back to
+the CSV files until it is rebuilt.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from fx_rates import default_converter
+from ledger import SUBCATEGORY, load_ledger, source_files
+
+# Fixed-width column files and their dtypes
+COLUMN_DTYPES = {
+    'day': np.int32,            # days since 1970-01-01
+    'account': np.uint8,        # code into meta['accounts']
+    'category': np.uint16,      # code into meta['categories']
+    'subcategory': np.uint16,   # code into meta['subcategories'] (0 = none)
+    'cents': np.int64,          # amount in cents
+    'desc_end': np.int64,       # end offset of the description in the string heap
+}
+# Expense columns that can be grouped on, with their code file and dictionary
+GROUP_KEYS = {
+    'Compte': ('account', 'accounts'),
+    'Categorie': ('category', 'categories'),
+    SUBCATEGORY: ('subcategory', 'subcategories'),
+}
+
+
+class ColumnarStore:
+    def __init__(self, store_dir: Optional[Path] = None, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.store_dir = Path(store_dir) if store_dir else self.base_dir / "Columnar"
+        self.meta_file = self.store_dir / "meta.json"
+        self.heap_file = self.store_dir / "descriptions.heap"
+        self.meta = self._load_meta()
+
+    def _load_meta(self) -> Dict:
+        """Load store metadata (row count and dictionaries)."""
+        if self.meta_file.exists():
+            try:
+                with open(self.meta_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                pass
+        return {'rows': 0, 'heap_bytes': 0, 'accounts': [], 'categories': [], 'subcategories': ['']}
+
+    def _save_meta(self):
+        """Write metadata atomically; this is the commit point of an append."""
+        tmp_file = self.meta_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.meta_file)
+
+    def _column_file(self, name: str) -> Path:
+        return self.store_dir / f"{name}.bin"
+
+    def exists(self) -> bool:
+        """Whether a store has been built."""
+        return self.meta_file.exists()
+
+    def source_fingerprint(self) -> Dict:
+        """Size and mtime of every source CSV, plus the exchange-rate table used."""
+        files = {}
+        for path in source_files(self.base_dir):
+            stat = path.stat()
+            files[str(path.relative_to(self.base_dir))] = [stat.st_size, stat.st_mtime_ns]
+        return {'files': files, 'fx': default_converter().cache_tag()}
+
+    def is_fresh(self) -> bool:
+        """Whether the store holds exactly the current CSV files."""
+        return self.exists() and self.meta.get('sources') == self.source_fingerprint()
+
+    def record_sources(self, fingerprint: Optional[Dict] = None):
+        """Mark the store as matching the CSV files (after a write to both)."""
+        self.meta['sources'] = fingerprint or self.source_fingerprint()
+        self._save_meta()
+
+    def build(self):
+        """Rebuild the store from the CSV files."""
+        fingerprint = self.source_fingerprint()
+        self.rebuild(load_ledger(self.base_dir))
+        self.record_sources(fingerprint)
+
+    def __len__(self) -> int:
+        return self.meta['rows']
+
+    def _encode(self, values: pd.Series, key: str, limit: int) -> np.ndarray:
+        """Map string values to dictionary codes, extending the dictionary."""
+        dictionary: List[str] = self.meta[key]
+        index = {value: code for code, value in enumerate(dictionary)}
+        for value in pd.unique(values):
+            if value not in index:
+                if len(dictionary) >= limit:
+                    raise ValueError(f"Too many distinct {key} for the column width")
+                index[value] = len(dictionary)
+                dictionary.append(value)
+        return values.map(index).to_numpy()
+
+    def append(self, df: pd.DataFrame):
+        """Append normalized expense rows to every column file."""
+        self.store_dir.mkdir(exist_ok=True)
+        if df.empty:
+            self._save_meta()
+            return
+        rows, heap_bytes = self.meta['rows'], self.meta['heap_bytes']
+
+        # Drop any tail left behind by an interrupted append
+        for name, dtype in COLUMN_DTYPES.items():
+            path = self._column_file(name)
+            if path.exists():
+                os.truncate(path, rows * np.dtype(dtype).itemsize)
+        if self.heap_file.exists():
+            os.truncate(self.heap_file, heap_bytes)
+
+        subcategories = df[SUBCATEGORY] if SUBCATEGORY in df.columns else pd.Series('', index=df.index)
+        encoded_desc = [str(d).encode('utf-8') for d in df['Description']]
+        lengths = np.fromiter((len(d) for d in encoded_desc), dtype=np.int64, count=len(encoded_desc))
+
+        columns = {
+            'day': df['Date'].to_numpy(dtype='datetime64[D]').astype(np.int32),
+            'account': self._encode(df['Compte'].astype(str), 'accounts', 256),
+            'category': self._encode(df['Categorie'].astype(str), 'categories', 65536),
+            'subcategory': self._encode(subcategories.fillna('').astype(str), 'subcategories', 65536),
+            'cents': np.round(df['Montant'].to_numpy(dtype=float) * 100).astype(np.int64),
+            'desc_end': heap_bytes + np.cumsum(lengths),
+        }
+        for name, dtype in COLUMN_DTYPES.items():
+            with open(self._column_file(name), 'ab') as f:
+                f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        with open(self.heap_file, 'ab') as f:
+            f.write(b''.join(encoded_desc))
+
+        self.meta['rows'] = rows + len(df)
+        self.meta['heap_bytes'] = heap_bytes + int(lengths.sum())
+        self._save_meta()
+
+    def rebuild(self, df: pd.DataFrame):
+        """Replace the store contents with the given rows."""
+        for name in COLUMN_DTYPES:
+            self._column_file(name).unlink(missing_ok=True)
+        self.heap_file.unlink(missing_ok=True)
+        self.meta = {'rows': 0, 'heap_bytes': 0, 'accounts': [], 'categories': [], 'subcategories': ['']}
+        self.append(df)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Zero-copy, read-only views of every column file."""
+        rows = self.meta['rows']
+        arrays = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            if rows == 0:
+                arrays[name] = np.empty(0, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(self._column_file(name), dtype=dtype, mode='r', shape=(rows,))
+        return arrays
+
+    def descriptions(self, rows: Optional[np.ndarray] = None) -> List[str]:
+        """Decode descriptions from the string heap (all rows or the selected ones)."""
+        ends = self.arrays()['desc_end']
+        if len(ends) == 0 or self.meta['heap_bytes'] == 0:
+            return [''] * (len(ends) if rows is None else len(rows))
+        heap = np.memmap(self.heap_file, dtype=np.uint8, mode='r', shape=(self.meta['heap_bytes'],))
+        starts = np.concatenate(([0], ends[:-1]))
+        if rows is not None:
+            starts, ends = starts[rows], ends[rows]
+        return [heap[s:e].tobytes().decode('utf-8') for s, e in zip(starts, ends)]
+
+    def to_frame(self, with_descriptions: bool = True) -> pd.DataFrame:
+        """Expose the store as an expense DataFrame with categorical string columns.
+
+        This copies every row; aggregates should use sum_by() or totals(),
+        which work on the memory-mapped arrays directly.
+        """
+        arrays = self.arrays()
+        subcategories = pd.Categorical.from_codes(arrays['subcategory'].astype(np.int32), self.meta['subcategories'])
+        df = pd.DataFrame({
+            'Date': pd.to_datetime(arrays['day'].astype('datetime64[D]')),
+            'Compte': pd.Categorical.from_codes(arrays['account'].astype(np.int16), self.meta['accounts']),
+            'Categorie': pd.Categorical.from_codes(arrays['category'].astype(np.int32), self.meta['categories']),
+            SUBCATEGORY: pd.Series(subcategories).replace('', None),
+            'Montant': arrays['cents'] / 100.0,
+        })
+        if with_descriptions:
+            df['Description'] = self.descriptions()
+        return df
+
+    def sum_by(self, column: str) -> pd.Series:
+        """Total amount per account/category/subcategory straight from the codes."""
+        key = {'account': 'accounts', 'category': 'categories', 'subcategory': 'subcategories'}[column]
+        arrays = self.arrays()
+        labels = self.meta[key]
+        totals = np.bincount(arrays[column], weights=arrays['cents'], minlength=len(labels)) / 100.0
+        return pd.Series(totals, index=labels).sort_values(ascending=False)
+
+    def totals(self, columns: List[str]) -> pd.DataFrame:
+        """Montant and Transactions per combination of Compte/Categorie/Sous-categorie,
+        from one bincount over the memory-mapped codes."""
+        if len(self) == 0:
+            return pd.DataFrame(columns=columns + ['Montant', 'Transactions'])
+        arrays = self.arrays()
+        sizes = [len(self.meta[GROUP_KEYS[c][1]]) for c in columns]
+        key = np.zeros(len(self), dtype=np.int64)
+        for column, size in zip(columns, sizes):
+            key = key * size + arrays[GROUP_KEYS[column][0]]
+        cells = int(np.prod(sizes))
+        cents = np.bincount(key, weights=arrays['cents'], minlength=cells)
+        counts = np.bincount(key, minlength=cells)
+        present = np.flatnonzero(counts)
+        result = {}
+        for column, codes in zip(columns, np.unravel_index(present, sizes)):
+            result[column] = np.array(self.meta[GROUP_KEYS[column][1]], dtype=object)[codes]
+        result['Montant'] = cents[present] / 100.0
+        result['Transactions'] = counts[present]
+        df = pd.DataFrame(result)
+        if SUBCATEGORY in columns:
+            df[SUBCATEGORY] = df[SUBCATEGORY].replace('', None)
+        return df
+
+
+def main():
+    store = ColumnarStore()
+
+    while True:
+        print("\n" + "="*40)
+        print("🗄️  COLUMNAR STORE")
+        print("="*40)
+        print("1. 🔨 Build store from CSV files")
+        print("2. 📊 Store statistics")
+        print("3. 🚪 Exit")
+        print("="*40)
+
+        choice = input("\nSelect option (1-3): ").strip()
+
+        if choice == '1':
+            start = time.perf_counter()
+            store.build()
+            print(f"✅ Stored {len(store)} rows in {store.store_dir} ({time.perf_counter() - start:.2f}s)")
+        elif choice == '2':
+            if not store.exists():
+                print("❌ No columnar store found. Build it first.")
+            else:
+                start = time.perf_counter()
+                totals = store.sum_by('account')
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"\n📦 Rows: {len(store)}{'' if store.is_fresh() else ' (out of date, rebuild it)'}")
+                for account, total in totals.items():
+                    print(f"   👤 {account}: €{total:.2f}")
+                print(f"⏱️  Computed in {elapsed:.1f} ms")
+        elif choice == '3':
+            print("👋 Goodbye!")
+            break
+        else:
+            print("❌ Invalid choice.")
+
+        input("\nPress Enter to continue...")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'build':
+        ColumnarStore().build()
+    else:
+        main()
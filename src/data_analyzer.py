@@ -12,58 +12,47 @@ from typing import Dict, List, Tuple
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from columnar_store import ColumnarStore
+from ledger import expenses_file
+from retention import RetentionManager
+from sketches import SketchStore
+
 class DataAnalyzer:
+    """Every report reads the same files (ledger.source_files): through the
+    columnar store while it is fresh, the retention rollups and the sketches."""
+
     def __init__(self):
         self.base_dir = Path(__file__).parent.parent
-        self.expenses_file = self.base_dir / "Expenses" / "expenses_working.txt"
-        self.fixed_charges_file = self.base_dir / "fixed_charges.csv"
+        self.expenses_file = expenses_file(self.base_dir)
         self.income_file = self.base_dir / "income.csv"
         self.history_dir = self.base_dir / "History"
+        self.columnar_store = ColumnarStore()
+        self.retention = RetentionManager(self.base_dir)
+        self.sketches = SketchStore(self.base_dir)
         
         # Set up plotting style
         plt.style.use('default')
         sns.set_palette("husl")
     
-    def load_all_data(self) -> pd.DataFrame:
-        """Load and combine all expense data."""
-        all_data = []
-        
-        # Load current expenses
-        if self.expenses_file.exists():
-            df = pd.read_csv(self.expenses_file)
-            if not df.empty:
-                all_data.append(df)
-        
-        # Load fixed charges
-        if self.fixed_charges_file.exists():
-            df = pd.read_csv(self.fixed_charges_file)
-            if not df.empty:
-                all_data.append(df)
-        
-        # Load historical data
-        if self.history_dir.exists():
-            for file in self.history_dir.glob("*.csv"):
-                df = pd.read_csv(file)
-                if not df.empty:
-                    all_data.append(df)
-        
-        if not all_data:
-            return pd.DataFrame()
-        
-        combined_df = pd.concat(all_data, ignore_index=True)
-        combined_df['Date'] = pd.to_datetime(combined_df['Date'], dayfirst=True)
-        return combined_df
+    def _totals(self, columns: List[str]) -> pd.DataFrame:
+        """Montant and Transactions per account and/or category over all data.
+
+        Computed straight from the columnar store's memory-mapped codes while
+        it matches the CSV files, else from the retention rollups.
+        """
+        if self.columnar_store.is_fresh():
+            return self.columnar_store.totals(columns)
+        if self.columnar_store.exists():
+            print("⚠️  Columnar store is out of date, reading the CSV files "
+                  "(rebuild it with: python src/columnar_store.py build)")
+        df = self.retention.monthly_totals()
+        return df.groupby(columns, as_index=False)[['Montant', 'Transactions']].sum()
     
     def spending_trends(self, months: int = 6):
         """Analyze spending trends over time."""
-        df = self.load_all_data()
-        if df.empty:
-            print("❌ No data available for analysis.")
-            return
-        
-        # Filter to last N months
+        # Filter to last N months; daily rollups answer for compacted months
         cutoff_date = datetime.now() - timedelta(days=months*30)
-        df_filtered = df[df['Date'] >= cutoff_date].copy()
+        df_filtered = self.retention.daily_totals(start=cutoff_date.date())
         
         if df_filtered.empty:
             print(f"❌ No data available for the last {months} months.")
@@ -99,7 +88,7 @@ class DataAnalyzer:
     
     def category_analysis(self):
         """Detailed category analysis."""
-        df = self.load_all_data()
+        df = self._totals(['Categorie'])
         if df.empty:
             print("❌ No data available for analysis.")
             return
@@ -108,11 +97,10 @@ class DataAnalyzer:
         print("="*50)
         
         # Category statistics
-        category_stats = df.groupby('Categorie').agg({
-            'Montant': ['sum', 'mean', 'count']
-        }).round(2)
-        
-        category_stats.columns = ['Total', 'Average', 'Count']
+        category_stats = df.groupby('Categorie')[['Montant', 'Transactions']].sum()
+        category_stats.columns = ['Total', 'Count']
+        category_stats['Average'] = category_stats['Total'] / category_stats['Count']
+        category_stats = category_stats.round(2)
         category_stats = category_stats.sort_values('Total', ascending=False)
         
         print("\n📊 Category Statistics:")
@@ -120,12 +108,12 @@ class DataAnalyzer:
             print(f"   {category}:")
             print(f"     Total: €{row['Total']:.2f}")
             print(f"     Average: €{row['Average']:.2f}")
-            print(f"     Transactions: {row['Count']}")
+            print(f"     Transactions: {int(row['Count'])}")
             print()
     
     def account_comparison(self):
         """Compare spending between accounts."""
-        df = self.load_all_data()
+        df = self._totals(['Compte', 'Categorie'])
         if df.empty:
             print("❌ No data available for analysis.")
             return
@@ -154,7 +142,8 @@ class DataAnalyzer:
     
     def generate_charts(self, save_path: str = None):
         """Generate and save charts."""
-        df = self.load_all_data()
+        # Totals come from the monthly rollups, the distribution from merged sketches
+        df = self.retention.monthly_totals()
         if df.empty:
             print("❌ No data available for charts.")
             return
@@ -170,7 +159,7 @@ class DataAnalyzer:
         fig.suptitle('Expense Analysis Dashboard', fontsize=16, fontweight='bold')
         
         # 1. Monthly spending trend
-        monthly_data = df.groupby(df['Date'].dt.to_period('M'))['Montant'].sum()
+        monthly_data = df.groupby('Month')['Montant'].sum()
         axes[0, 0].plot(range(len(monthly_data)), monthly_data.values, marker='o', linewidth=2)
         axes[0, 0].set_title('Monthly Spending Trend')
         axes[0, 0].set_xlabel('Month')
@@ -189,8 +178,8 @@ class DataAnalyzer:
         axes[1, 0].set_ylabel('Amount (€)')
         
         # 4. Daily spending distribution
-        daily_spending = df.groupby(df['Date'].dt.date)['Montant'].sum()
-        axes[1, 1].hist(daily_spending.values, bins=20, alpha=0.7, color='#96CEB4')
+        daily_values, daily_weights = self.sketches.merged()['daily'].items()
+        axes[1, 1].hist(daily_values, bins=20, weights=daily_weights, alpha=0.7, color='#96CEB4')
         axes[1, 1].set_title('Daily Spending Distribution')
         axes[1, 1].set_xlabel('Amount (€)')
         axes[1, 1].set_ylabel('Frequency')
@@ -206,8 +195,9 @@ class DataAnalyzer:
     
     def spending_insights(self):
         """Generate spending insights and recommendations."""
-        df = self.load_all_data()
-        if df.empty:
+        summary = self.sketches.merged()
+        transactions, daily = summary['transactions'], summary['daily']
+        if not transactions.count:
             print("❌ No data available for insights.")
             return
         
@@ -215,24 +205,24 @@ class DataAnalyzer:
         print("="*50)
         
         # Most expensive day
-        daily_totals = df.groupby(df['Date'].dt.date)['Montant'].sum()
-        most_expensive_day = daily_totals.idxmax()
-        most_expensive_amount = daily_totals.max()
+        most_expensive_day, most_expensive_amount = summary['max_day']
         print(f"💰 Most expensive day: {most_expensive_day} (€{most_expensive_amount:.2f})")
         
         # Most expensive category
-        category_totals = df.groupby('Categorie')['Montant'].sum()
+        category_totals = self.retention.monthly_totals().groupby('Categorie')['Montant'].sum()
         most_expensive_category = category_totals.idxmax()
         most_expensive_category_amount = category_totals.max()
         print(f"📂 Most expensive category: {most_expensive_category} (€{most_expensive_category_amount:.2f})")
         
         # Average transaction size
-        avg_transaction = df['Montant'].mean()
-        print(f"📊 Average transaction size: €{avg_transaction:.2f}")
+        avg_transaction = transactions.mean()
+        print(f"📊 Average transaction size: €{avg_transaction:.2f} "
+              f"(median €{transactions.quantile(0.5):.2f}, 90% under €{transactions.quantile(0.9):.2f})")
+        print(f"📆 Daily spending: median €{daily.quantile(0.5):.2f}, 90% of days under €{daily.quantile(0.9):.2f}")
         
         # Spending frequency
-        total_days = (df['Date'].max() - df['Date'].min()).days + 1
-        days_with_expenses = df['Date'].dt.date.nunique()
+        total_days = (pd.Timestamp(summary['last']) - pd.Timestamp(summary['first'])).days + 1
+        days_with_expenses = summary['days']
         spending_frequency = (days_with_expenses / total_days) * 100
         print(f"📅 Spending frequency: {spending_frequency:.1f}% of days")
         
@@ -246,10 +236,22 @@ class DataAnalyzer:
             print("   💰 Your average transaction is high. Look for ways to reduce large purchases.")
         
         # Find potential savings
-        small_expenses = df[df['Montant'] < 10]
-        if not small_expenses.empty:
-            small_total = small_expenses['Montant'].sum()
-            print(f"   💡 Small expenses (<€10) total: €{small_total:.2f} - consider tracking these better.")
+        small_total = transactions.sum_below(10)
+        if small_total > 0:
+            print(f"   💡 Small expenses (<€10) total: ~€{small_total:.2f} - consider tracking these better.")
+    
+    def top_merchants(self, limit: int = 10, account: str = None):
+        """Show where the most money goes, from the merged merchant sketches."""
+        merchants = self.sketches.merged(accounts=[account] if account else None)['merchants'].top(limit)
+        if not merchants:
+            print("❌ No data available for analysis.")
+            return
+        
+        print(f"\n🏪 TOP MERCHANTS{f' - {account}' if account else ''}")
+        print("="*50)
+        for merchant, amount, count, error in merchants:
+            bound = f" (at most €{error:.2f} overestimated)" if error else ""
+            print(f"   {merchant}: €{amount:.2f}{bound} over {count} transactions")
 
 def main():
     analyzer = DataAnalyzer()
@@ -263,10 +265,11 @@ def main():
         print("3. 👥 Account comparison")
         print("4. 📊 Generate charts")
         print("5. 💡 Spending insights")
-        print("6. 🚪 Exit")
+        print("6. 🏪 Top merchants")
+        print("7. 🚪 Exit")
         print("="*40)
         
-        choice = input("\nSelect option (1-6): ").strip()
+        choice = input("\nSelect option (1-7): ").strip()
         
         if choice == '1':
             months = input("Number of months to analyze (default 6): ").strip()
@@ -281,6 +284,9 @@ def main():
         elif choice == '5':
             analyzer.spending_insights()
         elif choice == '6':
+            account = input("Account (Commun/Luc/Laura) or leave empty for all: ").strip()
+            analyzer.top_merchants(account=account or None)
+        elif choice == '7':
             print("👋 Goodbye!")
             break
         else:
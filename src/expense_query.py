@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Expense Query
+A small expression language for ad-hoc questions over all expenses, compiled
+to vectorized masks, with date predicates pushed down to the History
+partitions and only the needed columns read.
+
+Example:
+    python src/expense_query.py "category=Shopping account=Laura amount>50 since=2025-03 group=week"
+
+Filters (combined with AND):
+    date / since / until   YYYY, YYYY-MM or YYYY-MM-DD with = != > >= < <=
+    account, category, subcategory, description
+                           = or != (comma-separated values), ~ for "contains"
+    amount                 = != > >= < <=
+Output:
+    group=day|week|month|year|account|category|subcategory (comma-separated)
+    agg=sum|count|mean|min|max  (default sum when grouping)
+Without group or agg, the matching rows are listed.
+"""
+
+import re
+import shlex
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from fx_rates import CURRENCY, default_converter
+from ledger import SUBCATEGORY, may_hold, source_files
+
+FIELDS = {
+    'date': 'Date', 'since': 'Date', 'until': 'Date',
+    'account': 'Compte', 'compte': 'Compte',
+    'category': 'Categorie', 'categorie': 'Categorie',
+    'subcategory': SUBCATEGORY, 'sous-categorie': SUBCATEGORY,
+    'amount': 'Montant', 'montant': 'Montant',
+    'description': 'Description',
+}
+GROUPS = {
+    'day': 'D', 'week': 'W', 'month': 'M', 'year': 'Y',
+    'account': 'Compte', 'category': 'Categorie', 'subcategory': SUBCATEGORY,
+}
+AGGREGATES = ('sum', 'count', 'mean', 'min', 'max')
+TERM = re.compile(r'^([a-z][a-z-]*)\s*(>=|<=|!=|=|>|<|~)\s*(.*)$', re.IGNORECASE)
+ROW_COLUMNS = ['Date', 'Compte', 'Categorie', SUBCATEGORY, 'Description', 'Montant']
+
+
+def _date_span(value: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """[start, end) covered by YYYY, YYYY-MM or YYYY-MM-DD."""
+    if re.fullmatch(r'\d{4}', value):
+        period = pd.Period(value, freq='Y')
+    elif re.fullmatch(r'\d{4}-\d{2}', value):
+        period = pd.Period(value, freq='M')
+    elif re.fullmatch(r'\d{4}-\d{2}-\d{2}', value):
+        period = pd.Period(value, freq='D')
+    else:
+        raise ValueError(f"Invalid date: {value} (use YYYY, YYYY-MM or YYYY-MM-DD)")
+    return period.start_time, (period + 1).start_time
+
+
+class Query:
+    def __init__(self, expression: str):
+        self.filters: List[Tuple[str, str, object]] = []
+        self.group_by: List[str] = []
+        self.agg: Optional[str] = None
+        # Date range [low, high) implied by the filters, used for pushdown
+        self.low: Optional[pd.Timestamp] = None
+        self.high: Optional[pd.Timestamp] = None
+        self._parse(expression)
+
+    def _narrow(self, low: Optional[pd.Timestamp] = None, high: Optional[pd.Timestamp] = None):
+        if low is not None and (self.low is None or low > self.low):
+            self.low = low
+        if high is not None and (self.high is None or high < self.high):
+            self.high = high
+
+    def _parse(self, expression: str):
+        for token in shlex.split(expression):
+            match = TERM.match(token)
+            if not match:
+                raise ValueError(f"Cannot parse '{token}'")
+            name, op, value = match.group(1).lower(), match.group(2), match.group(3).strip()
+            if name == 'group':
+                for group in value.lower().split(','):
+                    if group not in GROUPS:
+                        raise ValueError(f"Unknown group '{group}' (use {', '.join(GROUPS)})")
+                    self.group_by.append(group)
+            elif name == 'agg':
+                if value.lower() not in AGGREGATES:
+                    raise ValueError(f"Unknown aggregate '{value}' (use {', '.join(AGGREGATES)})")
+                self.agg = value.lower()
+            elif name not in FIELDS:
+                raise ValueError(f"Unknown field '{name}' (use {', '.join(FIELDS)})")
+            elif FIELDS[name] == 'Date':
+                self._add_date_filter(name, op, value)
+            elif FIELDS[name] == 'Montant':
+                if op == '~':
+                    raise ValueError("'~' only applies to text fields")
+                self.filters.append(('Montant', op, float(value.replace(',', '.'))))
+            else:
+                if op not in ('=', '!=', '~'):
+                    raise ValueError(f"'{op}' does not apply to {name}")
+                values = [v.strip().lower() for v in value.split(',')] if op != '~' else value.lower()
+                self.filters.append((FIELDS[name], op, values))
+
+    def _add_date_filter(self, name: str, op: str, value: str):
+        if name == 'since':
+            op = '>='
+        elif name == 'until':
+            op = '<='
+        start, end = _date_span(value)
+        if op == '=':
+            self.filters.append(('Date', '>=', start))
+            self.filters.append(('Date', '<', end))
+            self._narrow(start, end)
+        elif op == '!=':
+            self.filters.append(('Date', 'not in', (start, end)))
+        elif op == '>=':
+            self.filters.append(('Date', '>=', start))
+            self._narrow(low=start)
+        elif op == '>':
+            self.filters.append(('Date', '>=', end))
+            self._narrow(low=end)
+        elif op == '<':
+            self.filters.append(('Date', '<', start))
+            self._narrow(high=start)
+        elif op == '<=':
+            self.filters.append(('Date', '<', end))
+            self._narrow(high=end)
+        else:
+            raise ValueError("'~' does not apply to dates")
+
+    def columns(self) -> List[str]:
+        """Source columns needed to evaluate the query."""
+        needed = {'Date', 'Montant', CURRENCY}
+        needed.update(column for column, _, _ in self.filters)
+        needed.update(GROUPS[g] for g in self.group_by if len(GROUPS[g]) > 1)
+        if self.lists_rows():
+            needed.update(ROW_COLUMNS)
+        return sorted(needed)
+
+    def lists_rows(self) -> bool:
+        """Without group or aggregate, the query returns the matching rows."""
+        return not self.group_by and self.agg is None
+
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Boolean mask of the rows matching every filter."""
+        mask = np.ones(len(df), dtype=bool)
+        for column, op, value in self.filters:
+            if column == 'Date':
+                dates = df['Date']
+                if op == '>=':
+                    mask &= (dates >= value).to_numpy()
+                elif op == '<':
+                    mask &= (dates < value).to_numpy()
+                else:
+                    mask &= ~((dates >= value[0]) & (dates < value[1])).to_numpy()
+            elif column == 'Montant':
+                amounts = df['Montant'].to_numpy(dtype=float)
+                mask &= {
+                    '=': np.isclose(amounts, value), '!=': ~np.isclose(amounts, value),
+                    '>': amounts > value, '>=': amounts >= value,
+                    '<': amounts < value, '<=': amounts <= value,
+                }[op]
+            else:
+                text = df[column].fillna('').astype(str).str.strip().str.lower()
+                if op == '~':
+                    mask &= text.str.contains(value, regex=False).to_numpy()
+                elif op == '=':
+                    mask &= text.isin(value).to_numpy()
+                else:
+                    mask &= ~text.isin(value).to_numpy()
+        return mask
+
+    def aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Group and aggregate matching rows (or list them when neither is given)."""
+        if self.lists_rows():
+            return df[ROW_COLUMNS].sort_values('Date').reset_index(drop=True)
+        agg = self.agg or 'sum'
+        if not self.group_by:
+            return pd.DataFrame({'Montant': [df['Montant'].agg(agg)]})
+        keys = []
+        for group in self.group_by:
+            column = GROUPS[group]
+            if len(column) == 1:
+                keys.append(df['Date'].dt.to_period(column).astype(str).rename(group))
+            else:
+                keys.append(df[column].rename(group))
+        return df.groupby(keys, dropna=False)['Montant'].agg(agg).reset_index()
+
+
+class QueryEngine:
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.last_stats: Dict = {}
+
+    def partitions(self, query: Query) -> Tuple[List[Path], int]:
+        """Files that can hold rows in the query's date range, and the total count.
+
+        Pruning uses the first and last date actually in each file, never its
+        name: a History file can hold several months.
+        """
+        candidates = source_files(self.base_dir)
+        selected = [path for path in candidates if may_hold(path, query.low, query.high)]
+        return selected, len(candidates)
+
+    def _read(self, path: Path, query: Query) -> pd.DataFrame:
+        """Read only the needed columns, filtering each chunk as it arrives."""
+        needed = set(query.columns())
+        matches = []
+        for chunk in pd.read_csv(path, usecols=lambda c: c.strip() in needed,
+                                 skipinitialspace=True, chunksize=100_000):
+            chunk.columns = [c.strip() for c in chunk.columns]
+            if chunk.empty:
+                continue
+            for column in needed - set(chunk.columns) - {CURRENCY}:
+                chunk[column] = None
+            chunk['Date'] = pd.to_datetime(chunk['Date'], dayfirst=True)
+            chunk['Montant'] = pd.to_numeric(chunk['Montant'], errors='coerce').fillna(0.0)
+            chunk = default_converter().convert(chunk)
+            chunk = chunk[query.mask(chunk)]
+            if not chunk.empty:
+                matches.append(chunk)
+        return pd.concat(matches, ignore_index=True) if matches else pd.DataFrame(columns=sorted(needed))
+
+    def run(self, expression: str) -> pd.DataFrame:
+        """Evaluate a query expression."""
+        start = time.perf_counter()
+        query = Query(expression)
+        paths, total = self.partitions(query)
+        frames = [df for df in (self._read(p, query) for p in paths) if not df.empty]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=query.columns())
+        df['Date'] = pd.to_datetime(df['Date'])
+        df['Montant'] = df['Montant'].astype(float)
+        result = query.aggregate(df)
+        self.last_stats = {
+            'partitions_read': len(paths),
+            'partitions_total': total,
+            'rows_matched': len(df),
+            'seconds': time.perf_counter() - start,
+        }
+        return result
+
+
+def main():
+    engine = QueryEngine()
+    expressions = [' '.join(sys.argv[1:])] if len(sys.argv) > 1 else None
+
+    while True:
+        expression = expressions.pop() if expressions else input("\n🔍 Query (empty to exit): ").strip()
+        if not expression:
+            print("👋 Goodbye!")
+            break
+        try:
+            result = engine.run(expression)
+        except ValueError as e:
+            print(f"❌ {e}")
+        else:
+            with pd.option_context('display.max_rows', 200, 'display.width', 120):
+                if 'Montant' in result.columns:
+                    result['Montant'] = result['Montant'].round(2)
+                print(result.to_string(index=False) if not result.empty else "No matching expenses.")
+            stats = engine.last_stats
+            print(f"\n📦 {stats['rows_matched']} rows matched | {stats['partitions_read']}/"
+                  f"{stats['partitions_total']} partitions read | {stats['seconds'] * 1000:.0f} ms")
+        if len(sys.argv) > 1:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -12,14 +12,24 @@ from pathlib import Path
 import pandas as pd
 from typing import Dict, List, Optional, Tuple
 
+from columnar_store import ColumnarStore
+from fx_rates import BASE_CURRENCY, CURRENCY, FxConverter
+from ledger import ACCOUNTS, PAYER, expenses_file, read_csv_cached
+from settlement import load_settlement_config
+from summary_store import SummaryStore
+
 class ExpenseTracker:
     def __init__(self):
         self.base_dir = Path(__file__).parent.parent
-        self.expenses_file = self.base_dir / "Expenses" / "expenses_working.csv"
+        self.expenses_file = expenses_file(self.base_dir)
         self.fixed_charges_file = self.base_dir / "budget/charges_fixes.csv"
         self.income_file = self.base_dir / "budget/income.csv"
         self.summary_dir = self.base_dir / "Summary"
         self.history_dir = self.base_dir / "History"
+        self.summary_store = SummaryStore(self.base_dir)
+        self.columnar_store = ColumnarStore()
+        self.fx = FxConverter()
+        self.settlement = load_settlement_config(self.base_dir / "budget" / "settlement.json")
         
         # Ensure directories exist
         self.expenses_file.parent.mkdir(exist_ok=True)
@@ -45,7 +55,7 @@ class ExpenseTracker:
         }
         
         # Accounts
-        self.accounts = ['Commun', 'Luc', 'Laura']
+        self.accounts = list(ACCOUNTS)
         
         # Initialize files if they don't exist
         self._initialize_files()
@@ -85,6 +95,41 @@ class ExpenseTracker:
         except ValueError:
             return None
     
+    def _parse_amount(self, amount_str: str) -> Optional[Tuple[float, str]]:
+        """Parse an amount with an optional currency code, e.g. '12.50 USD'."""
+        parts = amount_str.split()
+        currency = BASE_CURRENCY
+        if len(parts) == 2 and parts[1].isalpha():
+            currency = parts[1].upper()
+            if currency not in self.fx.currencies():
+                print(f"❌ No FX rate for {currency} in {self.fx.rates_file.name}.")
+                return None
+        elif len(parts) != 1:
+            return None
+        amount = self._validate_amount(parts[0])
+        return (amount, currency) if amount is not None else None
+    
+    def _header(self) -> List[str]:
+        with open(self.expenses_file, 'r', newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), [])
+    
+    def _ensure_column(self, column: str, fill: str):
+        """Add a column to the working file, existing rows getting `fill`."""
+        with open(self.expenses_file, 'r', newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        if rows and column in rows[0]:
+            return
+        header = rows[0] if rows else ['Date', 'Compte', 'Categorie', 'Description', 'Montant']
+        # Write a copy and swap it in, so a crash never leaves a half-written month
+        tmp_file = self.expenses_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header + [column])
+            for row in rows[1:]:
+                if row:
+                    writer.writerow(row + [fill])
+        os.replace(tmp_file, self.expenses_file)
+    
     def _get_user_input(self, prompt: str, default: str = "", validator=None) -> str:
         """Get user input with validation."""
         while True:
@@ -147,25 +192,71 @@ class ExpenseTracker:
         if not description:
             description = "No description"
         
-        # Amount
+        # Amount, in euros unless a currency code follows it
         while True:
-            amount_str = input("Enter amount (€): ").strip()
-            amount = self._validate_amount(amount_str)
-            if amount is not None:
+            amount_str = input("Enter amount (€, or e.g. '12.50 USD'): ").strip()
+            parsed = self._parse_amount(amount_str)
+            if parsed is not None:
+                amount, currency = parsed
                 break
             print("❌ Invalid amount. Please enter a positive number.")
         
-        # Save to file
+        # Who paid a shared expense, for the settlement balances
+        payer = None
+        if account == self.settlement['account']:
+            members = self.settlement['members']
+            default_payer = self.settlement['default_payer']
+            print(f"\n🤝 Who paid?")
+            for i, member in enumerate(members, 1):
+                print(f"  {i}. {member}")
+            while True:
+                choice = input(f"Enter payer number (1-{len(members)})"
+                               f"{f' [{default_payer}]' if default_payer else ''}: ").strip()
+                if not choice and default_payer:
+                    payer = default_payer
+                    break
+                if choice.isdigit() and 1 <= int(choice) <= len(members):
+                    payer = members[int(choice) - 1]
+                    break
+                print("❌ Invalid choice. Please select a valid number.")
+        
+        # Save to file; the columnar store only follows if it matched the files before
+        store_fresh = self.columnar_store.is_fresh()
+        if currency != BASE_CURRENCY:
+            self._ensure_column(CURRENCY, BASE_CURRENCY)
+        if payer:
+            self._ensure_column(PAYER, '')
+        values = {'Date': date_input, 'Compte': account, 'Categorie': category,
+                  'Description': description, 'Montant': f"{amount:.2f}",
+                  CURRENCY: currency, PAYER: payer or ''}
+        row = [values.get(column, '') for column in self._header()]
         with open(self.expenses_file, 'a', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
-            writer.writerow([date_input, account, category, description, f"{amount:.2f}"])
+            writer.writerow(row)
+        
+        # Keep the columnar store in sync when it is in use
+        if store_fresh:
+            self.columnar_store.append(self.fx.convert(pd.DataFrame([{
+                'Date': datetime.strptime(date_input, "%d/%m/%Y"),
+                'Compte': account,
+                'Categorie': category,
+                'Description': description,
+                'Montant': amount,
+                CURRENCY: currency,
+            }])))
+            self.columnar_store.record_sources()
         
         print(f"\n✅ Expense added successfully!")
         print(f"   📅 Date: {date_input}")
         print(f"   👤 Account: {account}")
         print(f"   📂 Category: {category}")
         print(f"   📝 Description: {description}")
-        print(f"   💰 Amount: €{amount:.2f}")
+        if currency == BASE_CURRENCY:
+            print(f"   💰 Amount: €{amount:.2f}")
+        else:
+            print(f"   💰 Amount: {amount:.2f} {currency}")
+        if payer:
+            print(f"   🤝 Paid by: {payer}")
     
     def view_recent_expenses(self, limit: int = 10):
         """View recent expenses."""
@@ -173,7 +264,7 @@ class ExpenseTracker:
             print("❌ No expenses found.")
             return
         
-        df = pd.read_csv(self.expenses_file)
+        df = read_csv_cached(self.expenses_file)
         if df.empty:
             print("❌ No expenses found.")
             return
@@ -189,13 +280,13 @@ class ExpenseTracker:
             date_str = pd.to_datetime(row['Date']).strftime("%d/%m/%Y")
             print(f"{date_str} | {row['Compte']:8} | {row['Categorie']:12} | {row['Description']:20} | €{row['Montant']:8.2f}")
     
-    def monthly_summary(self):
+    def monthly_summary(self, export: bool = False):
         """Generate monthly summary with improved formatting."""
         if not self.expenses_file.exists():
             print("❌ No expenses found.")
             return
         
-        df = pd.read_csv(self.expenses_file)
+        df = read_csv_cached(self.expenses_file)
         if df.empty:
             print("❌ No expenses found.")
             return
@@ -218,7 +309,7 @@ class ExpenseTracker:
                 
                 # By category
                 category_summary = account_df.groupby('Categorie')['Montant'].sum().to_frame().sort_values('Montant', ascending=False)
-                for category, amount in category_summary['Montant']:
+                for category, amount in category_summary['Montant'].items():
                     percentage = (amount / total) * 100
                     print(f"   📂 {category}: €{amount:.2f} ({percentage:.1f}%)")
         
@@ -227,20 +318,25 @@ class ExpenseTracker:
         print(f"\n💰 TOTAL EXPENSES: €{total_expenses:.2f}")
         
         # Save summary to file
-        self._save_monthly_summary(df, current_month)
+        self._save_monthly_summary(df, current_month, export)
     
-    def _save_monthly_summary(self, df: pd.DataFrame, month: str):
-        """Save monthly summary to CSV files."""
+    def _save_monthly_summary(self, df: pd.DataFrame, month: str, export: bool = False):
+        """Save monthly summary to the summary store (and optionally to CSV files)."""
         month_name = datetime.strptime(month + "-01", "%Y-%m-%d").strftime("%B_%Y")
         
         for account in self.accounts:
             account_df = df[df['Compte'] == account]
             if not account_df.empty:
-                monthly_summary = account_df.groupby(['Month', 'Categorie'])['Montant'].sum().reset_index()
-                filename = f"{month_name}_summary_{account.lower()}.csv"
-                filepath = self.summary_dir / filename
-                monthly_summary.to_csv(filepath, index=False)
-                print(f"💾 Summary saved: {filename}")
+                monthly_summary = account_df.groupby(['Month', 'Categorie'])['Montant'].agg(
+                    Montant='sum', Transactions='size').reset_index()
+                for summary_month, rows in monthly_summary.groupby('Month'):
+                    self.summary_store.replace_month(account, summary_month, rows.to_dict('records'), 'tracker')
+                print(f"💾 Summary saved for {account}")
+                if export:
+                    filename = f"{month_name}_summary_{account.lower()}.csv"
+                    filepath = self.summary_dir / filename
+                    monthly_summary[['Month', 'Categorie', 'Montant']].to_csv(filepath, index=False)
+                    print(f"💾 Summary exported: {filename}")
     
     def archive_month(self):
         """Archive current month's expenses."""
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Expense Watcher
+Follow expenses_working.csv as other processes append to it, parsing only the
+newly appended bytes, and keep live totals, budget alerts and a summary up to date.
+"""
+
+import hashlib
+import io
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Tuple
+
+from budget_variance import budget_line_keys, load_budget_tree
+from fx_rates import default_converter
+from ledger import COLUMNS, expenses_file, normalize
+
+# Bytes before the ingested offset used to detect rewrites
+CHECKSUM_WINDOW = 4096
+# Seconds without writes after which a final line lacking its newline is complete
+QUIET_PERIOD = 2.0
+ALERT_THRESHOLDS = (0.8, 1.0)
+
+
+class ExpenseWatcher:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else expenses_file()
+        self.listeners: List[Callable[[str, pd.DataFrame], None]] = []
+        self.offset = 0
+        self.checksum = b''
+        self.inode: Optional[int] = None
+        self.header: List[str] = COLUMNS
+
+    def subscribe(self, listener: Callable[[str, pd.DataFrame], None]):
+        """Call listener('reload', all_rows) or listener('append', new_rows) on changes."""
+        self.listeners.append(listener)
+
+    def _checksum(self, f, offset: int) -> bytes:
+        start = max(0, offset - CHECKSUM_WINDOW)
+        f.seek(start)
+        return hashlib.blake2b(f.read(offset - start), digest_size=16).digest()
+
+    def _parse(self, text: str) -> pd.DataFrame:
+        """Parse CSV lines (without header) into normalized expense rows."""
+        if not text.strip():
+            return pd.DataFrame(columns=self.header)
+        df = pd.read_csv(io.StringIO(text), names=self.header, header=None,
+                         skipinitialspace=True, skip_blank_lines=True)
+        return default_converter().convert(normalize(df))
+
+    def _complete_part(self, data: bytes, quiet: bool) -> bytes:
+        """Longest prefix of data made of complete rows: up to the last newline.
+
+        The legacy adder writes '\\n' before each row instead of after it, so
+        its last row never ends with a newline. That tail is only taken once
+        the file has been quiet for QUIET_PERIOD and the line has every column;
+        until then it may be a row another process is still writing.
+        """
+        end = data.rfind(b'\n') + 1
+        tail = data[end:]
+        if tail and quiet and tail.decode('utf-8', errors='replace').count(',') >= len(self.header) - 1:
+            return data
+        return data[:end]
+
+    def _reload(self, f, size: int, quiet: bool) -> Tuple[str, pd.DataFrame]:
+        f.seek(0)
+        header, newline, body = f.read(size).partition(b'\n')
+        self.header = [c.strip() for c in header.decode('utf-8').strip().split(',')] if header.strip() else COLUMNS
+        body = self._complete_part(body, quiet)
+        rows = self._parse(body.decode('utf-8'))
+        self.offset = len(header) + len(newline) + len(body) if newline or quiet else 0
+        self.checksum = self._checksum(f, self.offset)
+        return 'reload', rows
+
+    def poll(self) -> Tuple[str, pd.DataFrame]:
+        """Check the file once: ('unchanged' | 'append' | 'reload', rows)."""
+        if not self.path.exists():
+            changed = self.offset != 0
+            self.offset, self.checksum, self.inode = 0, b'', None
+            return ('reload' if changed else 'unchanged'), pd.DataFrame(columns=COLUMNS)
+
+        stat = os.stat(self.path)
+        quiet = time.time() - stat.st_mtime >= QUIET_PERIOD
+        with open(self.path, 'rb') as f:
+            rewritten = (
+                self.inode != stat.st_ino
+                or stat.st_size < self.offset
+                or self._checksum(f, self.offset) != self.checksum
+            )
+            if rewritten:
+                # Truncated, replaced (archive_month) or edited in place
+                self.inode = stat.st_ino
+                kind, rows = self._reload(f, stat.st_size, quiet)
+            elif stat.st_size > self.offset:
+                f.seek(self.offset)
+                data = self._complete_part(f.read(stat.st_size - self.offset), quiet)
+                if not data:
+                    return 'unchanged', pd.DataFrame(columns=COLUMNS)
+                self.offset += len(data)
+                self.checksum = self._checksum(f, self.offset)
+                kind, rows = 'append', self._parse(data.decode('utf-8'))
+                if rows.empty:
+                    # Only the newline a legacy row starts with
+                    return 'unchanged', rows
+            else:
+                return 'unchanged', pd.DataFrame(columns=COLUMNS)
+
+        for listener in self.listeners:
+            listener(kind, rows)
+        return kind, rows
+
+    def run(self, interval: float = 1.0):
+        """Poll until interrupted."""
+        print(f"👀 Watching {self.path} (Ctrl+C to stop)")
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching.")
+
+
+class LiveAggregates:
+    """Running totals per month, account and category, with budget alerts."""
+
+    def __init__(self, base_dir: Optional[Path] = None, quiet: bool = False):
+        base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.budget = load_budget_tree(base_dir / "budget" / "initial_budget.json")
+        self.quiet = quiet
+        self.reset()
+
+    def reset(self):
+        self.totals: Dict[Tuple[str, str, str], float] = {}
+        self.line_totals: Dict[Tuple[str, str, str], float] = {}
+        self.alerted: set = set()
+        self.rows = 0
+
+    def __call__(self, kind: str, rows: pd.DataFrame):
+        if kind == 'reload':
+            self.reset()
+        self.add(rows, alert=(kind == 'append'))
+        if not self.quiet:
+            self.print_summary(kind, len(rows))
+
+    def add(self, rows: pd.DataFrame, alert: bool = True) -> List[str]:
+        """Fold new rows into the totals; returns the alerts raised."""
+        if rows.empty:
+            return []
+        self.rows += len(rows)
+        months = rows['Date'].dt.strftime("%Y-%m")
+        for key, amount in rows.groupby([months, rows['Compte'], rows['Categorie']])['Montant'].sum().items():
+            self.totals[key] = self.totals.get(key, 0.0) + amount
+
+        categories, subcategories = budget_line_keys(rows)
+        touched = rows.groupby([months, categories, subcategories])['Montant'].sum()
+        alerts = []
+        for (month, category, subcategory), amount in touched.items():
+            key = (month, category, subcategory)
+            self.line_totals[key] = self.line_totals.get(key, 0.0) + amount
+            planned = self.budget.get(category, {}).get(subcategory, 0)
+            if not planned:
+                continue
+            for threshold in ALERT_THRESHOLDS:
+                if self.line_totals[key] >= planned * threshold and (key, threshold) not in self.alerted:
+                    self.alerted.add((key, threshold))
+                    if alert:
+                        alerts.append(f"{month} {category}/{subcategory}: €{self.line_totals[key]:.2f} "
+                                      f"of €{planned:.2f} ({self.line_totals[key] / planned * 100:.0f}%)")
+        for message in alerts:
+            print(f"⚠️  Budget alert: {message}")
+        return alerts
+
+    def month_totals(self, month: str) -> Dict[str, float]:
+        """Total per account for one month."""
+        result: Dict[str, float] = {}
+        for (m, account, _), amount in self.totals.items():
+            if m == month:
+                result[account] = result.get(account, 0.0) + amount
+        return result
+
+    def print_summary(self, kind: str, count: int):
+        month = datetime.now().strftime("%Y-%m")
+        stamp = datetime.now().strftime("%H:%M:%S")
+        action = "reloaded" if kind == 'reload' else "new"
+        print(f"\n🔄 [{stamp}] {count} {action} rows ({self.rows} total)")
+        for account, amount in sorted(self.month_totals(month).items()):
+            print(f"   👤 {account}: €{amount:.2f} this month")
+
+
+def main():
+    watcher = ExpenseWatcher()
+    watcher.subscribe(LiveAggregates())
+    interval = input("Polling interval in seconds (default 1): ").strip()
+    try:
+        interval = float(interval) if interval else 1.0
+    except ValueError:
+        interval = 1.0
+    watcher.run(interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+FX Rates
+Convert multi-currency amounts to a reporting currency using a local rate
+table (budget/fx_rates.csv) and a vectorized as-of join on the date.
+"""
+
+import hashlib
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+BASE_CURRENCY = 'EUR'
+CURRENCY = 'Devise'
+ORIGINAL_AMOUNT = 'Montant origine'
+RATE_COLUMNS = ['Date', 'Devise', 'Taux']
+
+
+class FxConverter:
+    """Rates are stored as the value in EUR of one unit of the currency on a date."""
+
+    def __init__(self, rates_file: Optional[Path] = None, reporting_currency: str = BASE_CURRENCY):
+        base_dir = Path(__file__).parent.parent
+        self.rates_file = Path(rates_file) if rates_file else base_dir / "budget" / "fx_rates.csv"
+        self.reporting_currency = reporting_currency.upper()
+        self._rates: Optional[pd.DataFrame] = None
+        # Currencies already warned about, so chunked reads warn once
+        self._reported = set()
+
+    @property
+    def rates(self) -> pd.DataFrame:
+        """Rate table sorted by date, loaded on first use."""
+        if self._rates is None:
+            if self.rates_file.exists():
+                rates = pd.read_csv(self.rates_file, skipinitialspace=True)
+            else:
+                rates = pd.DataFrame(columns=RATE_COLUMNS)
+            rates['Date'] = pd.to_datetime(rates['Date'], dayfirst=True).astype('datetime64[ns]')
+            rates['Devise'] = rates['Devise'].astype(str).str.strip().str.upper()
+            rates['Taux'] = pd.to_numeric(rates['Taux'], errors='coerce')
+            self._rates = rates.dropna().sort_values('Date', kind='stable').reset_index(drop=True)
+        return self._rates
+
+    def cache_tag(self) -> str:
+        """Identifies the rate table and reporting currency, for caching converted frames."""
+        digest = hashlib.blake2b(digest_size=8)
+        if self.rates_file.exists():
+            digest.update(self.rates_file.read_bytes())
+        return f"{self.reporting_currency}:{digest.hexdigest()}"
+
+    def currencies(self):
+        return sorted(set(self.rates['Devise']) | {BASE_CURRENCY})
+
+    def _rates_to_eur(self, dates: pd.Series, currencies: pd.Series) -> np.ndarray:
+        """EUR value of one unit of each row's currency, as of each row's date.
+
+        Uses the latest rate on or before the date, or the earliest known
+        rate for dates before the table starts.
+        """
+        result = np.full(len(dates), np.nan)
+        result[(currencies == BASE_CURRENCY).to_numpy()] = 1.0
+        foreign = (currencies != BASE_CURRENCY).to_numpy()
+        if not foreign.any():
+            return result
+
+        # Undated rows use the most recent rate
+        left = pd.DataFrame({
+            'Date': dates[foreign].fillna(pd.Timestamp.max).astype('datetime64[ns]').to_numpy(),
+            'Devise': currencies[foreign].to_numpy(),
+            '_row': np.flatnonzero(foreign),
+        }).sort_values('Date', kind='stable')
+        merged = pd.merge_asof(left, self.rates, on='Date', by='Devise', direction='backward')
+        missing = merged['Taux'].isna()
+        if missing.any():
+            forward = pd.merge_asof(left[missing.to_numpy()], self.rates, on='Date', by='Devise',
+                                    direction='forward')
+            merged.loc[missing, 'Taux'] = forward['Taux'].to_numpy()
+        result[merged['_row'].to_numpy()] = merged['Taux'].to_numpy()
+        return result
+
+    def convert(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return df with Montant in the reporting currency.
+
+        The original amount and currency are kept in 'Montant origine' and 'Devise'.
+        Rows in a currency without any rate are left out rather than counted
+        at face value.
+        """
+        if df.empty:
+            return df
+        has_currency = CURRENCY in df.columns
+        if not has_currency and self.reporting_currency == BASE_CURRENCY:
+            return df
+
+        df = df.copy()
+        if has_currency:
+            currencies = df[CURRENCY].fillna('').astype(str).str.strip().str.upper()
+            currencies = currencies.mask(currencies == '', BASE_CURRENCY)
+        else:
+            currencies = pd.Series(BASE_CURRENCY, index=df.index)
+        dates = pd.to_datetime(df['Date'], dayfirst=True)
+        amounts = pd.to_numeric(df['Montant'], errors='coerce').to_numpy(dtype=float)
+
+        to_eur = self._rates_to_eur(dates, currencies)
+        if self.reporting_currency == BASE_CURRENCY:
+            from_eur = np.ones(len(df))
+        else:
+            from_eur = self._rates_to_eur(dates, pd.Series(self.reporting_currency, index=df.index))
+
+        factor = to_eur / from_eur
+        df[CURRENCY] = currencies
+        df[ORIGINAL_AMOUNT] = amounts
+        df['Montant'] = np.round(amounts * factor, 2)
+
+        unknown = np.isnan(factor)
+        if unknown.any():
+            missing = set(currencies[unknown]) | ({self.reporting_currency} if np.isnan(from_eur).any() else set())
+            new = sorted(missing - self._reported)
+            if new:
+                print(f"⚠️  No FX rate for {', '.join(new)} in {self.rates_file.name}; "
+                      f"those expenses are left out of the totals.")
+                self._reported.update(new)
+            df = df[~unknown]
+        return df
+
+
+_default_converter: Optional[FxConverter] = None
+
+
+def default_converter() -> FxConverter:
+    """Process-wide converter to the default reporting currency."""
+    global _default_converter
+    if _default_converter is None:
+        _default_converter = FxConverter()
+    return _default_converter
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Ledger
+Shared helpers for locating and loading expense files (working file and History).
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fx_rates import BASE_CURRENCY, CURRENCY, default_converter
+from parse_cache import default_cache
+
+# Column layout of the expense CSV files
+COLUMNS = ['Date', 'Compte', 'Categorie', 'Description', 'Montant']
+SUBCATEGORY = 'Sous-categorie'
+# Who paid a shared expense (optional column, read by the settlement)
+PAYER = 'Payeur'
+# Accounts expenses are booked to
+ACCOUNTS = ['Commun', 'Luc', 'Laura']
+# Columns identifying a row for hashing and sync, in their canonical text form
+ROW_COLUMNS = ['Date', 'Compte', 'Categorie', SUBCATEGORY, 'Description', 'Montant', CURRENCY, PAYER]
+
+BASE_DIR = Path(__file__).parent.parent
+
+
+def expenses_file(base_dir: Optional[Path] = None) -> Path:
+    """Path of the current month's working file."""
+    return Path(base_dir or BASE_DIR) / "expenses" / "expenses_working.csv"
+
+
+def history_dir(base_dir: Optional[Path] = None) -> Path:
+    """Path of the archived months directory."""
+    return Path(base_dir or BASE_DIR) / "History"
+
+
+def history_month(path: Path) -> Optional[str]:
+    """Month (YYYY-MM) of an archived file named {Month_Year}_expenses.csv."""
+    name = Path(path).name
+    if not name.endswith("_expenses.csv"):
+        return None
+    try:
+        return datetime.strptime(name[:-len("_expenses.csv")], "%B_%Y").strftime("%Y-%m")
+    except ValueError:
+        return None
+
+
+def history_files(base_dir: Optional[Path] = None) -> List[Path]:
+    """Archived monthly files, oldest first (unrecognised names last)."""
+    directory = history_dir(base_dir)
+    if not directory.exists():
+        return []
+    files = list(directory.glob("*.csv"))
+    return sorted(files, key=lambda f: (history_month(f) is None, history_month(f) or "", f.name))
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Give a raw expense frame typed dates/amounts and a sous-catégorie column."""
+    if df.empty:
+        return df
+    df = df.copy()
+    df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+    df['Montant'] = pd.to_numeric(df['Montant'], errors='coerce').fillna(0.0).astype(float)
+    if SUBCATEGORY not in df.columns:
+        df[SUBCATEGORY] = None
+    for column in ('Compte', 'Categorie', 'Description'):
+        df[column] = df[column].astype(str).str.strip()
+    return df
+
+
+def _parse_expenses(path: Path) -> pd.DataFrame:
+    return default_converter().convert(normalize(pd.read_csv(path, skipinitialspace=True)))
+
+
+def _parse_expense_csv(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    if 'Date' in df.columns and not df.empty:
+        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+        df = default_converter().convert(df)
+    return df
+
+
+def read_csv_cached(path: Path) -> pd.DataFrame:
+    """pd.read_csv with parsed dates and amounts in the reporting currency,
+    served from the parse cache when the file and rates are unchanged."""
+    return default_cache().load(path, _parse_expense_csv,
+                                tag=f"expense_csv:{default_converter().cache_tag()}")
+
+
+def read_expenses(path: Path, use_cache: bool = True) -> pd.DataFrame:
+    """Read and normalize one expense CSV file, amounts in the reporting currency.
+
+    Goes through the parse cache by default, so the converted amounts are
+    reused until the file or the FX rate table changes.
+    """
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame(columns=COLUMNS + [SUBCATEGORY])
+    if use_cache:
+        return default_cache().load(path, _parse_expenses, tag=f"ledger:{default_converter().cache_tag()}")
+    return _parse_expenses(path)
+
+
+def _parse_date_range(path: Path) -> pd.DataFrame:
+    dates = pd.Series([], dtype=str)
+    if path.stat().st_size > 0:
+        raw = pd.read_csv(path, usecols=lambda c: c.strip() == 'Date', dtype=str,
+                          keep_default_na=False, skipinitialspace=True)
+        if len(raw.columns):
+            dates = raw.iloc[:, 0].str.strip()
+    parsed = pd.to_datetime(dates, dayfirst=True, errors='coerce')
+    known = not parsed.isna().any()
+    return pd.DataFrame({'rows': [len(dates)],
+                         'first': [parsed.min() if known else pd.NaT],
+                         'last': [parsed.max() if known else pd.NaT]})
+
+
+# Date spans already looked up in this process, by (path, size, mtime_ns)
+_date_spans: Dict[Tuple[str, int, int], pd.Series] = {}
+
+
+def may_hold(path: Path, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> bool:
+    """Whether an expense file can have rows dated in [start, end) (bounds optional).
+
+    Decided from the first and last date actually in the file: a History file
+    is named after the month it was archived in and can hold several months.
+    Spans are keyed on the file's size and mtime only, so pruning costs one
+    stat per file (plus a tiny cache read the first time in a process), and
+    the file is read only when it changed. Files with an unparseable date are
+    always read.
+    """
+    stat = Path(path).stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    span = _date_spans.get(key)
+    if span is None:
+        span = default_cache().load(path, _parse_date_range, tag="dates", content_hash=False).iloc[0]
+        _date_spans[key] = span
+    if span['rows'] == 0:
+        return False
+    if pd.isna(span['first']):
+        return True
+    return (end is None or span['first'] < end) and (start is None or span['last'] >= start)
+
+
+def archive_dir(base_dir: Optional[Path] = None) -> Path:
+    """Path of the compressed yearly archives of compacted months."""
+    return history_dir(base_dir) / "archive"
+
+
+def archive_year(path: Path) -> Optional[int]:
+    """Year of a compressed yearly archive named {YYYY}.csv.gz."""
+    name = Path(path).name
+    if name.endswith(".csv.gz") and name[:-len(".csv.gz")].isdigit():
+        return int(name[:-len(".csv.gz")])
+    return None
+
+
+def archive_files(base_dir: Optional[Path] = None) -> List[Path]:
+    """Yearly archives, oldest first."""
+    directory = archive_dir(base_dir)
+    if not directory.exists():
+        return []
+    return sorted((f for f in directory.glob("*.csv.gz") if archive_year(f) is not None), key=archive_year)
+
+
+def source_files(base_dir: Optional[Path] = None, include_history: bool = True) -> List[Path]:
+    """Every expense file, oldest first, ending with the working file."""
+    paths = archive_files(base_dir) + history_files(base_dir) if include_history else []
+    paths.append(expenses_file(base_dir))
+    return [p for p in paths if p.exists()]
+
+
+def iter_chunks(paths: List[Path], chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+    """Stream normalized, currency-converted chunks of the given files in order.
+
+    Memory use is bounded by the chunk size, whatever the size of the history.
+    """
+    for path in paths:
+        for chunk in pd.read_csv(path, skipinitialspace=True, chunksize=chunksize):
+            if not chunk.empty:
+                yield default_converter().convert(normalize(chunk))
+
+
+def load_ledger(base_dir: Optional[Path] = None, include_history: bool = True) -> pd.DataFrame:
+    """Load the working file and, optionally, every archived month."""
+    paths = source_files(base_dir, include_history)
+    frames = [df for df in (read_expenses(p) for p in paths) if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS + [SUBCATEGORY])
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_raw(path: Path) -> pd.DataFrame:
+    """Read an expense file as text, exactly as stored."""
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, skipinitialspace=True)
+    df.columns = [c.strip() for c in df.columns]
+    return df
+
+
+def canonical_rows(raw: pd.DataFrame) -> pd.DataFrame:
+    """Text rows in ROW_COLUMNS with one spelling per value.
+
+    Dates become DD/MM/YYYY, amounts two decimals, blank currencies EUR, so
+    the same expense written by different tools compares (and hashes) equal.
+    """
+    if raw.empty:
+        return pd.DataFrame(columns=ROW_COLUMNS)
+    rows = pd.DataFrame(index=raw.index)
+    for column in ROW_COLUMNS:
+        values = raw[column] if column in raw.columns else pd.Series('', index=raw.index)
+        rows[column] = values.fillna('').astype(str).str.strip()
+    rows['Date'] = pd.to_datetime(rows['Date'], dayfirst=True).dt.strftime("%d/%m/%Y")
+    rows['Montant'] = pd.to_numeric(rows['Montant'], errors='coerce').fillna(0.0).map("{:.2f}".format)
+    rows[CURRENCY] = rows[CURRENCY].str.upper().mask(rows[CURRENCY] == '', BASE_CURRENCY)
+    return rows.reset_index(drop=True)
+
+
+def row_months(rows: pd.DataFrame) -> pd.Series:
+    """Month (YYYY-MM) of canonical rows."""
+    return rows['Date'].str[6:10] + '-' + rows['Date'].str[3:5]
+
+
+def row_hashes(rows: pd.DataFrame) -> pd.Series:
+    """Content hash of each canonical row.
+
+    Identical rows (two coffees the same day) are told apart by their
+    occurrence number, so a multiset of rows maps to a set of hashes. The
+    payer only enters the hash when set, so rows without one keep the hash
+    they had before the column existed.
+    """
+    if rows.empty:
+        return pd.Series([], dtype=str)
+    lines = rows['Date']
+    for column in ROW_COLUMNS[1:-1]:
+        lines = lines + '\x1f' + rows[column]
+    lines = lines + ('\x1f' + rows[PAYER]).where(rows[PAYER] != '', '')
+    occurrence = lines.groupby(lines).cumcount().astype(str)
+    return (lines + '\x1e' + occurrence).map(
+        lambda line: hashlib.blake2b(line.encode('utf-8'), digest_size=16).hexdigest())
+
+
+def write_rows(path: Path, rows: pd.DataFrame) -> int:
+    """Append canonical rows to an expense file (plain or .csv.gz), atomically.
+
+    The file keeps its own column order; Sous-categorie, Devise and Payeur
+    are only added when a new row needs them.
+    """
+    path = Path(path)
+    existing = read_raw(path)
+    columns = list(existing.columns)
+    if SUBCATEGORY not in columns and (rows[SUBCATEGORY] != '').any():
+        columns.append(SUBCATEGORY)
+    if CURRENCY not in columns and (rows[CURRENCY] != BASE_CURRENCY).any():
+        columns.append(CURRENCY)
+    if CURRENCY in columns and CURRENCY not in existing.columns:
+        existing[CURRENCY] = BASE_CURRENCY
+    if PAYER not in columns and (rows[PAYER] != '').any():
+        columns.append(PAYER)
+    combined = pd.concat([existing, rows.reindex(columns=columns)], ignore_index=True)
+    combined = combined.reindex(columns=columns).fillna('')
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    combined.to_csv(tmp_file, index=False, compression='gzip' if path.suffix == '.gz' else None)
+    os.replace(tmp_file, path)
+    return len(rows)
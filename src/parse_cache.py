@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Parse Cache
+Persistent cross-process cache of parsed, typed DataFrames, keyed by the
+fingerprint (path, size, mtime, content hash) of their source file.
+
+Usage:
+    python src/parse_cache.py stats
+    python src/parse_cache.py clear
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ParseCache:
+    """Entries are write-once files named {source}.{tag family}.{key}.pkl plus a
+    .json of metadata; recency is the entry's mtime, touched on every hit, so no
+    shared index has to be rewritten and concurrent processes cannot lose entries.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.base_dir = Path(__file__).parent.parent
+        self.cache_dir = Path(cache_dir) if cache_dir else self.base_dir / ".cache" / "parsed"
+        self.max_bytes = max_bytes
+
+    def fingerprint(self, path: Path, content_hash: bool = True) -> Dict:
+        """Identify the exact contents of a source file.
+
+        Without content_hash only the stat is used: one system call instead of
+        reading the file, for derived values cheap enough to recompute if a
+        same-size rewrite within the mtime resolution slips through.
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        digest = None
+        if content_hash:
+            blake = hashlib.blake2b(digest_size=16)
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    blake.update(block)
+            digest = blake.hexdigest()
+        return {
+            'path': str(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': digest,
+        }
+
+    def _key(self, fingerprint: Dict, tag: str) -> str:
+        raw = json.dumps([fingerprint, tag, pd.__version__], sort_keys=True)
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _prefix(self, path: str, tag: str) -> str:
+        """Entry name prefix shared by every version of one file under one parser."""
+        source = hashlib.blake2b(path.encode('utf-8'), digest_size=8).hexdigest()
+        family = ''.join(c if c.isalnum() or c in '-_' else '_' for c in tag.split(':')[0])
+        return f"{source}.{family or 'default'}"
+
+    def _write_atomic(self, target: Path, write: Callable[[Path], None]):
+        tmp_file = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        write(tmp_file)
+        os.replace(tmp_file, target)
+
+    def load(self, path: Path, parser: Callable[[Path], pd.DataFrame], tag: str = "",
+             content_hash: bool = True) -> pd.DataFrame:
+        """Return the parsed frame for path, parsing and caching it on a miss.
+
+        `tag` distinguishes different parsers (or parser options) of the same file;
+        anything after a ':' identifies extra inputs such as the FX rate table.
+        """
+        path = Path(path)
+        fingerprint = self.fingerprint(path, content_hash)
+        prefix = self._prefix(fingerprint['path'], tag)
+        entry_file = self.cache_dir / f"{prefix}.{self._key(fingerprint, tag)}.pkl"
+
+        if entry_file.exists():
+            try:
+                df = pd.read_pickle(entry_file)
+                os.utime(entry_file)
+                return df
+            except Exception:
+                # Unreadable (or just evicted by another process) entry: re-parse
+                entry_file.unlink(missing_ok=True)
+
+        df = parser(path)
+
+        # Older versions of the same file (or of the parser's inputs, after the
+        # ':' in the tag) are now stale
+        for stale in self.cache_dir.glob(f"{prefix}.*.pkl"):
+            if stale != entry_file:
+                stale.unlink(missing_ok=True)
+                stale.with_suffix('.json').unlink(missing_ok=True)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._write_atomic(entry_file.with_suffix('.json'), lambda tmp: tmp.write_text(
+            json.dumps(dict(fingerprint, tag=tag), indent=2), encoding='utf-8'))
+        self._write_atomic(entry_file, df.to_pickle)
+        self._evict()
+        return df
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        entries = []
+        for entry_file in self.cache_dir.glob("*.pkl"):
+            try:
+                entries.append((entry_file, entry_file.stat()))
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = self._entries()
+        total = sum(stat.st_size for _, stat in entries)
+        for entry_file, stat in sorted(entries, key=lambda e: e[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            entry_file.unlink(missing_ok=True)
+            entry_file.with_suffix('.json').unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def stats(self) -> Dict:
+        """Summary of cache usage."""
+        entries = self._entries()
+        files = set()
+        for entry_file, _ in entries:
+            try:
+                files.add(json.loads(entry_file.with_suffix('.json').read_text(encoding='utf-8'))['path'])
+            except (OSError, ValueError, KeyError):
+                pass
+        return {
+            'entries': len(entries),
+            'bytes': sum(stat.st_size for _, stat in entries),
+            'max_bytes': self.max_bytes,
+            'files': sorted(files),
+        }
+
+    def clear(self) -> int:
+        """Remove every cached entry; returns the number of files deleted."""
+        removed = 0
+        if self.cache_dir.exists():
+            for file in list(self.cache_dir.glob("*.pkl")) + list(self.cache_dir.glob("*.json")) \
+                    + list(self.cache_dir.glob("*.tmp")):
+                file.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+_default_cache: Optional[ParseCache] = None
+
+
+def default_cache() -> ParseCache:
+    """Process-wide cache instance in the project's cache directory."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ParseCache()
+    return _default_cache
+
+
+def print_stats(cache: ParseCache):
+    stats = cache.stats()
+    print("\n🗃️  PARSE CACHE")
+    print("="*40)
+    print(f"📁 Directory: {cache.cache_dir}")
+    print(f"📦 Entries: {stats['entries']}")
+    print(f"💾 Size: {stats['bytes'] / 1024:.1f} KiB / {stats['max_bytes'] / 1024 / 1024:.0f} MiB")
+    for path in stats['files']:
+        print(f"   📄 {path}")
+
+
+def main():
+    cache = default_cache()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+
+    if command == 'stats':
+        print_stats(cache)
+    elif command == 'clear':
+        removed = cache.clear()
+        print(f"🧹 Cache cleared ({removed} files removed)")
+    else:
+        print(f"❌ Unknown command: {command} (use 'stats' or 'clear')")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Replica Sync
+Bring two copies of the expense data (working file, History and archives) to
+the same content by exchanging a hash tree (root → year → month → row hashes)
+and transferring only the rows one side is missing.
+
+Sync is a union: rows are never deleted or edited, only added where missing.
+
+Usage:
+    python src/replica_sync.py /path/to/other/copy     # two local directories
+    python src/replica_sync.py serve [port]             # expose this copy
+    python src/replica_sync.py localhost:8765           # sync with a served copy
+"""
+
+import hashlib
+import json
+import socket
+import socketserver
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from columnar_store import ColumnarStore
+from fx_rates import default_converter
+from ledger import (ROW_COLUMNS, archive_files, archive_year, canonical_rows, expenses_file,
+                    history_dir, history_month, normalize, read_raw, row_hashes, row_months,
+                    source_files, write_rows)
+from parse_cache import default_cache
+from retention import RetentionManager
+
+DEFAULT_PORT = 8765
+
+
+def _digest(parts: Iterable[str]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+def _parse_rows(path: Path) -> pd.DataFrame:
+    return canonical_rows(read_raw(path))
+
+
+class Replica:
+    """One copy of the expense data, seen as month → set of row hashes."""
+
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.retention = RetentionManager(self.base_dir)
+        self.columnar_store = ColumnarStore(self.base_dir / "Columnar", self.base_dir)
+        self._state: Optional[pd.DataFrame] = None
+        self._state_key: Optional[Tuple] = None
+
+    def _files_key(self, paths: List[Path]) -> Tuple:
+        return tuple((str(p), p.stat().st_size, p.stat().st_mtime_ns) for p in paths)
+
+    def rows_state(self) -> pd.DataFrame:
+        """Every canonical row with its Month, Hash and File, reparsed only when files change."""
+        paths = source_files(self.base_dir)
+        key = self._files_key(paths)
+        if self._state is not None and key == self._state_key:
+            return self._state
+        frames = []
+        for path in paths:
+            # The tag changes with the row format, so older cached rows are not reused
+            rows = default_cache().load(path, _parse_rows, tag=f"sync:{','.join(ROW_COLUMNS)}")
+            if not rows.empty:
+                frames.append(rows.assign(File=str(path)))
+        if frames:
+            state = pd.concat(frames, ignore_index=True)
+        else:
+            state = pd.DataFrame(columns=ROW_COLUMNS + ['File'])
+        state['Month'] = row_months(state)
+        state['Hash'] = row_hashes(state).to_numpy()
+        self._state, self._state_key = state, key
+        return state
+
+    def tree(self) -> Dict:
+        """Hash tree: {'root': h, 'years': {YYYY: h}, 'months': {YYYY-MM: h}}."""
+        state = self.rows_state()
+        months = {month: _digest(sorted(hashes))
+                  for month, hashes in state.groupby('Month')['Hash']}
+        years: Dict[str, List[str]] = {}
+        for month in sorted(months):
+            years.setdefault(month[:4], []).append(f"{month}:{months[month]}")
+        years = {year: _digest(entries) for year, entries in years.items()}
+        root = _digest(f"{year}:{h}" for year, h in sorted(years.items()))
+        return {'root': root, 'years': years, 'months': months}
+
+    def row_hashes(self, months: Iterable[str]) -> Dict[str, List[str]]:
+        state = self.rows_state()
+        wanted = state[state['Month'].isin(list(months))]
+        return {month: sorted(hashes) for month, hashes in wanted.groupby('Month')['Hash']}
+
+    def rows(self, hashes: Iterable[str]) -> List[Dict]:
+        """Rows with the given hashes, as dicts of ROW_COLUMNS plus Hash."""
+        state = self.rows_state()
+        wanted = state[state['Hash'].isin(set(hashes))]
+        return wanted[ROW_COLUMNS + ['Hash']].to_dict('records')
+
+    def _target_file(self, month: str, files: pd.Series) -> Path:
+        """File a new row of this month goes to: where the month already lives, else by age."""
+        working = expenses_file(self.base_dir)
+        present = set(files)
+        if str(working) in present:
+            return working
+        for name in sorted(present):
+            if history_month(Path(name)) == month:
+                return Path(name)
+        for archive in archive_files(self.base_dir):
+            if str(archive) in present or (archive_year(archive) == int(month[:4])
+                                           and month in self.retention.compacted_months()):
+                return archive
+        if month >= datetime.now().strftime("%Y-%m"):
+            return working
+        name = pd.Period(month, freq='M').strftime("%B_%Y")
+        return history_dir(self.base_dir) / f"{name}_expenses.csv"
+
+    def merge(self, rows: pd.DataFrame) -> int:
+        """Deduplicating write path: append rows whose hash this replica lacks.
+
+        Rows carry the sender's Hash; without one they are hashed as a batch,
+        so importing the same rows twice adds nothing the second time.
+        """
+        if rows.empty:
+            return 0
+        incoming = canonical_rows(rows)
+        incoming['Month'] = row_months(incoming)
+        incoming['Hash'] = rows['Hash'].to_numpy() if 'Hash' in rows.columns else row_hashes(incoming).to_numpy()
+        incoming = incoming.drop_duplicates('Hash')
+
+        state = self.rows_state()
+        incoming = incoming[~incoming['Hash'].isin(set(state['Hash']))]
+        if incoming.empty:
+            return 0
+
+        targets: Dict[Path, List[pd.DataFrame]] = {}
+        month_files = state.groupby('Month')['File']
+        for month, group in incoming.groupby('Month'):
+            files = month_files.get_group(month) if month in month_files.groups else pd.Series([], dtype=str)
+            targets.setdefault(self._target_file(month, files), []).append(group[ROW_COLUMNS])
+
+        store_fresh = self.columnar_store.is_fresh()
+        added = 0
+        for path, groups in targets.items():
+            batch = pd.concat(groups, ignore_index=True)
+            batch = batch.assign(_d=pd.to_datetime(batch['Date'], format="%d/%m/%Y")) \
+                .sort_values('_d', kind='stable').drop(columns='_d')
+            added += write_rows(path, batch)
+            if archive_year(path) is not None:
+                self.retention.rebuild_rollups(archive_year(path))
+            # Keep the columnar store in sync when it is in use
+            if store_fresh:
+                self.columnar_store.append(default_converter().convert(normalize(batch)))
+        if store_fresh:
+            self.columnar_store.record_sources()
+        self._state = None
+        return added
+
+
+class ReplicaServer:
+    """Answers sync requests about one replica."""
+
+    def __init__(self, replica: Replica):
+        self.replica = replica
+
+    def handle(self, request: Dict) -> Dict:
+        op = request.get('op')
+        if op == 'root':
+            return {'root': self.replica.tree()['root']}
+        if op == 'years':
+            return {'years': self.replica.tree()['years']}
+        if op == 'months':
+            years = set(request['years'])
+            return {'months': {m: h for m, h in self.replica.tree()['months'].items() if m[:4] in years}}
+        if op == 'row_hashes':
+            return {'hashes': self.replica.row_hashes(request['months'])}
+        if op == 'rows':
+            return {'rows': self.replica.rows(request['hashes'])}
+        if op == 'merge':
+            return {'added': self.replica.merge(pd.DataFrame(request['rows']))}
+        return {'error': f"Unknown request: {op}"}
+
+
+class LocalTransport:
+    """Talks to a replica in another directory, through the same JSON messages as the socket."""
+
+    def __init__(self, base_dir: Path):
+        self.server = ReplicaServer(Replica(base_dir))
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def request(self, op: str, **args) -> Dict:
+        message = json.dumps({'op': op, **args})
+        self.bytes_sent += len(message)
+        response = json.dumps(self.server.handle(json.loads(message)))
+        self.bytes_received += len(response)
+        return json.loads(response)
+
+    def close(self):
+        pass
+
+
+class SocketTransport:
+    """Newline-delimited JSON requests over one TCP connection."""
+
+    def __init__(self, host: str = 'localhost', port: int = DEFAULT_PORT):
+        self.sock = socket.create_connection((host, port))
+        self.reader = self.sock.makefile('rb')
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def request(self, op: str, **args) -> Dict:
+        message = (json.dumps({'op': op, **args}) + "\n").encode('utf-8')
+        self.sock.sendall(message)
+        self.bytes_sent += len(message)
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Sync server closed the connection")
+        self.bytes_received += len(line)
+        response = json.loads(line)
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class ReplicaTCPServer(socketserver.TCPServer):
+    """TCP server that can be restarted right away on the same port."""
+    allow_reuse_address = True
+
+
+def serve(base_dir: Optional[Path] = None, host: str = 'localhost', port: int = DEFAULT_PORT):
+    """Serve this replica until interrupted.
+
+    There is no authentication or encryption: anyone who can reach the port
+    can read and add rows. Keep the default localhost (e.g. behind an SSH
+    tunnel) unless the network is trusted.
+    """
+    server_state = ReplicaServer(Replica(base_dir))
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    response = server_state.handle(json.loads(line))
+                except Exception as e:
+                    # Any failure is reported to the client; the connection stays usable
+                    response = {'error': f"{type(e).__name__}: {e}"}
+                self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+
+    if host not in ('localhost', '127.0.0.1', '::1'):
+        print(f"⚠️  Listening on {host}: the server is unauthenticated, "
+              "anyone who can reach this port can read and add expenses.")
+    with ReplicaTCPServer((host, port), Handler) as server:
+        print(f"🔌 Serving {server_state.replica.base_dir} on {host}:{port} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Server stopped.")
+
+
+def sync(local: Replica, remote) -> Dict:
+    """Two-way sync of a local replica with a remote transport; returns statistics."""
+    start = time.perf_counter()
+    stats = {'months_differing': 0, 'pulled': 0, 'pushed': 0}
+    tree = local.tree()
+    if remote.request('root')['root'] != tree['root']:
+        remote_years = remote.request('years')['years']
+        years = sorted(y for y in set(tree['years']) | set(remote_years)
+                       if tree['years'].get(y) != remote_years.get(y))
+        remote_months = remote.request('months', years=years)['months']
+        local_months = {m: h for m, h in tree['months'].items() if m[:4] in set(years)}
+        months = sorted(m for m in set(local_months) | set(remote_months)
+                        if local_months.get(m) != remote_months.get(m))
+        stats['months_differing'] = len(months)
+
+        remote_hashes = remote.request('row_hashes', months=months)['hashes']
+        local_hashes = local.row_hashes(months)
+        missing_here, missing_there = [], []
+        for month in months:
+            theirs, ours = set(remote_hashes.get(month, [])), set(local_hashes.get(month, []))
+            missing_here.extend(sorted(theirs - ours))
+            missing_there.extend(sorted(ours - theirs))
+
+        if missing_there:
+            stats['pushed'] = remote.request('merge', rows=local.rows(missing_there))['added']
+        if missing_here:
+            rows = remote.request('rows', hashes=missing_here)['rows']
+            stats['pulled'] = local.merge(pd.DataFrame(rows))
+    stats['bytes'] = remote.bytes_sent + remote.bytes_received
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def _open_remote(target: str):
+    path = Path(target).expanduser()
+    if path.is_dir():
+        return LocalTransport(path)
+    host, _, port = target.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f"Not a directory or host:port: {target}")
+    return SocketTransport(host or 'localhost', int(port))
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == 'serve':
+        serve(port=int(args[1]) if len(args) > 1 else DEFAULT_PORT,
+              host=args[2] if len(args) > 2 else 'localhost')
+        return
+
+    print("\n" + "="*40)
+    print("🔄 SYNC EXPENSES")
+    print("="*40)
+    target = args[0] if args else input("Other copy (directory or host:port): ").strip()
+    if not target:
+        print("❌ Nothing to sync with.")
+        return
+    try:
+        remote = _open_remote(target)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return
+    try:
+        stats = sync(Replica(), remote)
+    finally:
+        remote.close()
+    if not stats['months_differing']:
+        print("✅ Already in sync.")
+    else:
+        print(f"✅ {stats['months_differing']} months differed: "
+              f"{stats['pulled']} rows received, {stats['pushed']} rows sent")
+    print(f"📦 {stats['bytes']:,} bytes exchanged in {stats['seconds'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Report Exporter
+Stream transactions and monthly aggregates from the working file and History
+to CSV, JSON Lines or a static HTML report, without loading the whole history.
+"""
+
+import csv
+import gzip
+import html
+import json
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from typing import Dict, IO, Iterable, Iterator, Optional
+
+from ledger import SUBCATEGORY, iter_chunks, source_files
+
+EXPORT_COLUMNS = ['Date', 'Compte', 'Categorie', SUBCATEGORY, 'Description', 'Montant']
+AGGREGATE_COLUMNS = ['Month', 'Compte', 'Categorie', 'Montant', 'Transactions']
+FORMATS = {'csv': '.csv', 'jsonl': '.jsonl', 'html': '.html'}
+
+
+def _end_bound(end: str) -> pd.Timestamp:
+    """Exclusive upper bound of an inclusive end date; YYYY-MM covers the whole month."""
+    if len(end) == 7:
+        return (pd.Period(end, freq='M') + 1).start_time
+    return pd.Timestamp(end) + pd.Timedelta(days=1)
+
+
+def _add_to_totals(totals: Dict[tuple, list], row: Dict):
+    month = datetime.strptime(row['Date'], "%d/%m/%Y").strftime("%Y-%m")
+    entry = totals.setdefault((month, row['Compte'], row['Categorie']), [0.0, 0])
+    entry[0] += row['Montant']
+    entry[1] += 1
+
+
+def _iter_totals(totals: Dict[tuple, list]) -> Iterator[Dict]:
+    for (month, account, category), (amount, count) in sorted(totals.items()):
+        yield {'Month': month, 'Compte': account, 'Categorie': category,
+               'Montant': round(amount, 2), 'Transactions': count}
+
+
+class ReportExporter:
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.export_dir = self.base_dir / "exports"
+
+    def iter_transactions(self,
+                          start: Optional[str] = None,
+                          end: Optional[str] = None,
+                          account: Optional[str] = None,
+                          category: Optional[str] = None) -> Iterator[Dict]:
+        """Yield filtered transactions, oldest files first, one dict per row."""
+        start_date = pd.Timestamp(start) if start else None
+        end_bound = _end_bound(end) if end else None
+        for chunk in iter_chunks(source_files(self.base_dir)):
+            mask = pd.Series(True, index=chunk.index)
+            if start_date is not None:
+                mask &= chunk['Date'] >= start_date
+            if end_bound is not None:
+                mask &= chunk['Date'] < end_bound
+            if account:
+                mask &= chunk['Compte'] == account
+            if category:
+                mask &= chunk['Categorie'].str.lower() == category.lower()
+            chunk = chunk.loc[mask, EXPORT_COLUMNS]
+            chunk['Date'] = chunk['Date'].dt.strftime("%d/%m/%Y")
+            chunk[SUBCATEGORY] = chunk[SUBCATEGORY].where(chunk[SUBCATEGORY].notna(), '')
+            yield from chunk.to_dict('records')
+
+    def iter_monthly_aggregates(self, transactions: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield (month, account, category) totals of a transaction stream.
+
+        Only the running totals are kept, so memory grows with the number of
+        groups, not with the number of transactions.
+        """
+        totals: Dict[tuple, list] = {}
+        for row in transactions:
+            _add_to_totals(totals, row)
+        return _iter_totals(totals)
+
+    def _open(self, path: Path, compress: bool) -> IO[str]:
+        if compress:
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def _write_csv(self, f: IO[str], rows: Iterable[Dict], columns) -> int:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+
+    def _write_jsonl(self, f: IO[str], rows: Iterable[Dict]) -> int:
+        count = 0
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+        return count
+
+    def _write_html_table(self, f: IO[str], rows: Iterable[Dict], columns) -> int:
+        f.write("<table>\n<tr>" + "".join(f"<th>{html.escape(c)}</th>" for c in columns) + "</tr>\n")
+        count = 0
+        for row in rows:
+            cells = []
+            for column in columns:
+                value = row[column]
+                if column == 'Montant':
+                    cells.append(f'<td class="num">€{value:,.2f}</td>')
+                else:
+                    cells.append(f"<td>{html.escape(str(value))}</td>")
+            f.write("<tr>" + "".join(cells) + "</tr>\n")
+            count += 1
+        f.write("</table>\n")
+        return count
+
+    def _write_html(self, f: IO[str], transactions: Iterable[Dict], title: str,
+                    include_transactions: bool = True) -> int:
+        """Transactions table followed by the monthly totals, in a single pass."""
+        f.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                f"<title>{html.escape(title)}</title>\n<style>"
+                "body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:2em}"
+                "td,th{border:1px solid #ccc;padding:4px 8px}th{background:#4ECDC4}.num{text-align:right}"
+                "</style></head><body>\n"
+                f"<h1>{html.escape(title)}</h1>\n")
+
+        # Monthly totals are accumulated while the transactions stream past
+        totals: Dict[tuple, list] = {}
+
+        def accumulate(rows):
+            for row in rows:
+                _add_to_totals(totals, row)
+                yield row
+
+        if include_transactions:
+            f.write("<h2>Transactions</h2>\n")
+            count = self._write_html_table(f, accumulate(transactions), EXPORT_COLUMNS)
+        else:
+            for _ in accumulate(transactions):
+                pass
+        f.write("<h2>Monthly totals</h2>\n")
+        months = self._write_html_table(f, _iter_totals(totals), AGGREGATE_COLUMNS)
+        f.write(f"<p>Generated {datetime.now():%d/%m/%Y %H:%M}</p>\n</body></html>\n")
+        return count if include_transactions else months
+
+    def export(self,
+               kind: str = 'transactions',
+               fmt: str = 'csv',
+               output: Optional[Path] = None,
+               compress: bool = False,
+               **filters) -> Path:
+        """Export 'transactions' or 'monthly' aggregates in csv/jsonl/html format."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        if kind not in ('transactions', 'monthly'):
+            raise ValueError(f"Unknown export: {kind}")
+        if output is None:
+            self.export_dir.mkdir(exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output = self.export_dir / f"{kind}_{stamp}{FORMATS[fmt]}{'.gz' if compress else ''}"
+        output = Path(output)
+
+        transactions = self.iter_transactions(**filters)
+        with self._open(output, compress) as f:
+            if fmt == 'html':
+                rows = self._write_html(f, transactions, f"Expense report ({kind})",
+                                        include_transactions=(kind == 'transactions'))
+            else:
+                columns = EXPORT_COLUMNS
+                rows_iter = transactions
+                if kind == 'monthly':
+                    columns, rows_iter = AGGREGATE_COLUMNS, self.iter_monthly_aggregates(transactions)
+                if fmt == 'csv':
+                    rows = self._write_csv(f, rows_iter, columns)
+                else:
+                    rows = self._write_jsonl(f, rows_iter)
+        print(f"💾 Exported {rows} rows to {output}")
+        return output
+
+
+def main():
+    exporter = ReportExporter()
+
+    print("\n" + "="*40)
+    print("📤 EXPORT REPORT")
+    print("="*40)
+    kind = 'monthly' if input("Export (1) transactions or (2) monthly totals [1]: ").strip() == '2' else 'transactions'
+    fmt = input("Format (csv/jsonl/html) [csv]: ").strip().lower() or 'csv'
+    if fmt not in FORMATS:
+        print("❌ Invalid format. Defaulting to csv.")
+        fmt = 'csv'
+
+    filters = {}
+    for key, prompt in (('start', "From date (YYYY-MM-DD)"), ('end', "To date (YYYY-MM-DD or YYYY-MM)")):
+        value = input(f"{prompt} or leave empty: ").strip()
+        if value:
+            try:
+                pd.Timestamp(value)
+                filters[key] = value
+            except ValueError:
+                print("❌ Invalid date ignored.")
+    account = input("Account (Commun/Luc/Laura) or leave empty for all: ").strip()
+    if account:
+        filters['account'] = account
+    category = input("Category or leave empty for all: ").strip()
+    if category:
+        filters['category'] = category
+    compress = input("Compress with gzip? (y/N): ").strip().lower() == 'y'
+
+    exporter.export(kind, fmt, compress=compress, **filters)
+
+
+if __name__ == "__main__":
+    main()
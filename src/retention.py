@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Retention
+Fold History months older than a configurable age into compressed yearly
+archives plus daily and monthly rollups, and answer long-range queries from the
+rollups, touching raw rows only for recent months or when detail is requested.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from typing import Dict, List, Optional
+
+from fx_rates import default_converter
+from ledger import (SUBCATEGORY, archive_dir, archive_files, archive_year, expenses_file,
+                    history_dir, history_files, may_hold, read_expenses, read_raw)
+
+DEFAULT_KEEP_MONTHS = 12
+GROUP_COLUMNS = ['Compte', 'Categorie', SUBCATEGORY]
+
+
+def _aggregate(df: pd.DataFrame, key: pd.Series, name: str) -> pd.DataFrame:
+    """Sum and count rows per key and (account, category, sous-catégorie)."""
+    columns = [name] + GROUP_COLUMNS + ['Montant', 'Transactions']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    grouped = df.groupby([key.rename(name)] + [df[c] for c in GROUP_COLUMNS], dropna=False)['Montant']
+    result = grouped.agg(['sum', 'size']).reset_index()
+    return result.rename(columns={'sum': 'Montant', 'size': 'Transactions'})[columns]
+
+
+class RetentionManager:
+    def __init__(self, base_dir: Optional[Path] = None, keep_months: int = DEFAULT_KEEP_MONTHS):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.history_dir = history_dir(self.base_dir)
+        self.archive_dir = archive_dir(self.base_dir)
+        self.rollup_dir = self.history_dir / "rollups"
+        self.manifest_file = self.rollup_dir / "manifest.json"
+        self.keep_months = keep_months
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_file.exists():
+            try:
+                with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                pass
+        return {'months': [], 'fx': None}
+
+    def _save_manifest(self, manifest: Dict):
+        self.rollup_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    def compacted_months(self) -> List[str]:
+        return sorted(self._load_manifest()['months'])
+
+    def cutoff_month(self) -> str:
+        """Months strictly before this one are compacted."""
+        return str(pd.Period(datetime.now(), freq='M') - self.keep_months)
+
+    def _rollup_file(self, year: int, kind: str) -> Path:
+        return self.rollup_dir / f"{year}_{kind}.csv"
+
+    def _write_archive(self, archive: Path, rows: pd.DataFrame):
+        tmp_file = archive.with_name(f"{archive_year(archive)}.tmp")
+        rows.to_csv(tmp_file, index=False, compression='gzip')
+        os.replace(tmp_file, archive)
+
+    def _recover(self, manifest: Dict):
+        """Finish or undo a compaction that was interrupted.
+
+        Archives are written before the History files are deleted: if any of
+        them is already gone the archives are complete, otherwise they are cut
+        back to the rows they held before and the files compacted again.
+        """
+        pending = manifest.pop('pending', None)
+        if not pending:
+            return
+        paths = [self.history_dir / name for name in pending['files']]
+        if all(path.exists() for path in paths):
+            for year, count in pending['rows'].items():
+                archive = self.archive_dir / f"{year}.csv.gz"
+                if not archive.exists():
+                    continue
+                if count:
+                    self._write_archive(archive, read_raw(archive).iloc[:count])
+                    self._build_rollups(archive)
+                else:
+                    archive.unlink()
+                    for kind in ('daily', 'monthly'):
+                        self._rollup_file(int(year), kind).unlink(missing_ok=True)
+        else:
+            for path in paths:
+                path.unlink(missing_ok=True)
+        self._save_manifest(manifest)
+
+    def compact(self) -> List[str]:
+        """Move History files whose rows all predate the cutoff into yearly archives.
+
+        Each row goes to the archive of the year of its own date, whatever the
+        file is named; a file still holding a recent row is left as it is.
+        Returns the months of the rows moved.
+        """
+        manifest = self._load_manifest()
+        self._recover(manifest)
+        cutoff = pd.Period(self.cutoff_month(), freq='M').start_time
+        paths = [path for path in history_files(self.base_dir) if not may_hold(path, start=cutoff)]
+        if not paths:
+            return []
+
+        new_rows = pd.concat([read_raw(path) for path in paths], ignore_index=True).fillna('')
+        dates = pd.to_datetime(new_rows['Date'], dayfirst=True)
+        years = dates.dt.year
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        archives = {int(year): self.archive_dir / f"{int(year)}.csv.gz" for year in years.unique()}
+        existing = {year: read_raw(archive) for year, archive in archives.items()}
+        manifest['pending'] = {'files': [path.name for path in paths],
+                               'rows': {str(year): len(rows) for year, rows in existing.items()}}
+        self._save_manifest(manifest)
+
+        for year, rows in new_rows.groupby(years):
+            archive = archives[int(year)]
+            self._write_archive(archive, pd.concat([existing[int(year)], rows], ignore_index=True).fillna(''))
+            self._build_rollups(archive)
+
+        months = sorted(set(dates.dt.strftime("%Y-%m")))
+        manifest['months'] = sorted(set(manifest['months']) | set(months))
+        manifest['fx'] = default_converter().cache_tag()
+        for path in paths:
+            path.unlink()
+        del manifest['pending']
+        self._save_manifest(manifest)
+        return months
+
+    def _build_rollups(self, archive: Path):
+        """Write daily and monthly rollups of one yearly archive."""
+        self.rollup_dir.mkdir(parents=True, exist_ok=True)
+        year = archive_year(archive)
+        df = read_expenses(archive)
+        if df.empty:
+            daily, monthly = _aggregate(df, None, 'Date'), _aggregate(df, None, 'Month')
+        else:
+            daily = _aggregate(df, df['Date'].dt.strftime("%Y-%m-%d"), 'Date')
+            monthly = _aggregate(df, df['Date'].dt.strftime("%Y-%m"), 'Month')
+        daily.to_csv(self._rollup_file(year, 'daily'), index=False)
+        monthly.to_csv(self._rollup_file(year, 'monthly'), index=False)
+
+    def rebuild_rollups(self, year: int):
+        """Recompute the rollups of one year after rows were added to its archive."""
+        archive = self.archive_dir / f"{year}.csv.gz"
+        if archive.exists():
+            self._build_rollups(archive)
+
+    def ensure_rollups(self):
+        """Rebuild rollups when missing or computed with other FX rates."""
+        manifest = self._load_manifest()
+        tag = default_converter().cache_tag()
+        for archive in archive_files(self.base_dir):
+            year = archive_year(archive)
+            if manifest.get('fx') != tag or not self._rollup_file(year, 'monthly').exists() \
+                    or not self._rollup_file(year, 'daily').exists():
+                self._build_rollups(archive)
+        if manifest['months'] and manifest.get('fx') != tag:
+            manifest['fx'] = tag
+            self._save_manifest(manifest)
+
+    def _read_rollups(self, kind: str, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> pd.DataFrame:
+        """Rollups of the archives that can hold rows dated in [start, end)."""
+        frames = []
+        for archive in archive_files(self.base_dir):
+            path = self._rollup_file(archive_year(archive), kind)
+            if path.exists() and may_hold(archive, start, end):
+                frames.append(pd.read_csv(path, dtype={'Date': str, 'Month': str}))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _recent_rows(self, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> pd.DataFrame:
+        """Raw rows of the History files and working file that can hold dates in [start, end)."""
+        paths = history_files(self.base_dir) + [expenses_file(self.base_dir)]
+        frames = [read_expenses(path) for path in paths if path.exists() and may_hold(path, start, end)]
+        frames = [df for df in frames if not df.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Date', 'Montant'] + GROUP_COLUMNS)
+
+    def _totals(self, kind: str, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> pd.DataFrame:
+        self.ensure_rollups()
+        key = 'Date' if kind == 'daily' else 'Month'
+        fmt = "%Y-%m-%d" if kind == 'daily' else "%Y-%m"
+        low = start.strftime(fmt) if start is not None else None
+        high = end.strftime(fmt) if end is not None else None
+        # Exclusive upper bound for pruning files: the day or month after `end`
+        stop = (pd.Period(end, freq='D' if kind == 'daily' else 'M') + 1).start_time if end is not None else None
+
+        rolled = self._read_rollups(kind, start, stop)
+        recent = self._recent_rows(start, stop)
+        if not recent.empty:
+            recent = _aggregate(recent, recent['Date'].dt.strftime(fmt), key)
+        result = pd.concat([df for df in (rolled, recent) if not df.empty], ignore_index=True) \
+            if not (rolled.empty and recent.empty) else _aggregate(pd.DataFrame(), None, key)
+        if low is not None:
+            result = result[result[key] >= low]
+        if high is not None:
+            result = result[result[key] <= high]
+        result = result.groupby([key] + GROUP_COLUMNS, dropna=False)[['Montant', 'Transactions']].sum().reset_index()
+        if kind == 'daily':
+            result['Date'] = pd.to_datetime(result['Date'], format="%Y-%m-%d")
+        return result
+
+    def monthly_totals(self, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """Totals per month (YYYY-MM, inclusive range), account, category and sous-catégorie."""
+        return self._totals('monthly',
+                            pd.Timestamp(start) if start else None,
+                            pd.Timestamp(end) if end else None)
+
+    def daily_totals(self, start=None, end=None) -> pd.DataFrame:
+        """Totals per day (inclusive range), account, category and sous-catégorie."""
+        return self._totals('daily',
+                            pd.Timestamp(start) if start is not None else None,
+                            pd.Timestamp(end) if end is not None else None)
+
+    def rows(self, start=None, end=None) -> pd.DataFrame:
+        """Row-level detail; only files holding dates in the range are read."""
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        stop = end + pd.Timedelta(days=1) if end is not None else None
+        frames = [read_expenses(archive) for archive in archive_files(self.base_dir)
+                  if may_hold(archive, start, stop)]
+        frames.append(self._recent_rows(start, stop))
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=['Date', 'Montant'] + GROUP_COLUMNS)
+        df = pd.concat(frames, ignore_index=True)
+        if start is not None:
+            df = df[df['Date'] >= start]
+        if stop is not None:
+            df = df[df['Date'] < stop]
+        return df
+
+def main():
+    keep = input(f"Keep how many recent months as raw files? (default {DEFAULT_KEEP_MONTHS}): ").strip()
+    manager = RetentionManager(keep_months=int(keep) if keep.isdigit() else DEFAULT_KEEP_MONTHS)
+    print(f"\n🗜️  Compacting months before {manager.cutoff_month()}...")
+    compacted = manager.compact()
+    if compacted:
+        print(f"✅ Compacted {len(compacted)} months: {', '.join(compacted)}")
+        print(f"📁 Archives in {manager.archive_dir}, rollups in {manager.rollup_dir}")
+    else:
+        print("✅ Nothing to compact.")
+
+
+if __name__ == "__main__":
+    main()
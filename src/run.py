@@ -17,10 +17,17 @@ def main():
     print("4. ➕ Quick Add Expense (Legacy)")
     print("5. 📈 Monthly Summary (Legacy)")
     print("6. 📁 Archive Month (Legacy)")
-    print("7. 🚪 Exit")
+    print("7. 🏷️  Auto-categorize Import")
+    print("8. 📤 Export Report")
+    print("9. 👀 Watch Expenses")
+    print("10. 🗜️  Compact Old History")
+    print("11. 🔍 Query Expenses")
+    print("12. 🔄 Sync With Another Copy")
+    print("13. 🤝 Settle Shared Expenses")
+    print("14. 🚪 Exit")
     print("="*40)
     
-    choice = input("\nSelect a tool (1-7): ").strip()
+    choice = input("\nSelect a tool (1-14): ").strip()
     
     scripts = {
         '1': 'src/expense_tracker.py',
@@ -28,7 +35,14 @@ def main():
         '3': 'src/data_analyzer.py',
         '4': 'src/add_new_expense.py',
         '5': 'src/monthly_expenses_monitor.py',
-        '6': 'src/end_of_month_archive.py'
+        '6': 'src/end_of_month_archive.py',
+        '7': 'src/auto_categorizer.py',
+        '8': 'src/report_exporter.py',
+        '9': 'src/expense_watcher.py',
+        '10': 'src/retention.py',
+        '11': 'src/expense_query.py',
+        '12': 'src/replica_sync.py',
+        '13': 'src/settlement.py'
     }
     
     if choice in scripts:
@@ -38,11 +52,11 @@ def main():
             subprocess.run([sys.executable, str(script_path)])
         else:
             print(f"❌ Script not found: {scripts[choice]}")
-    elif choice == '7':
+    elif choice == '14':
         print("👋 Goodbye!")
         return
     else:
-        print("❌ Invalid choice. Please select 1-7.")
+        print("❌ Invalid choice. Please select 1-14.")
     
     input("\nPress Enter to return to main menu...")
     main()  # Restart the menu
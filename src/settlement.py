@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Settlement
+Who owes whom on the shared (Commun) account. Each shared expense credits the
+person who paid it (optional 'Payeur' column, else the configured default
+payer) and debits every member by their share, configured per category in
+budget/settlement.json and optionally weighted by the incomes of income.csv.
+
+Running balances are updated row by row and persisted per day and month in
+two tables of summary/summaries.sqlite: one row per month with that month's
+daily snapshots, plus a few scalar values (balances, watch offset). New rows of
+the working file are folded in without rereading the history and only rewrite
+the months they touch, and the balance at any date is a lookup.
+
+A row dated before the latest one already folded in shifts every later
+snapshot, so it rewrites each month from its own up to the latest: cheap for
+a forgotten receipt from last week, proportional to the history for a row
+from years ago.
+"""
+
+import bisect
+import hashlib
+import json
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from typing import Dict, List, Optional, Set, Tuple
+
+from budget_variance import load_income
+from expense_watcher import ExpenseWatcher
+from fx_rates import default_converter
+from ledger import PAYER, expenses_file, iter_chunks, source_files
+from summary_store import SummaryStore
+
+INCOME_SPLIT = 'income'
+DEFAULT_CONFIG = {
+    'account': 'Commun',
+    'members': ['Luc', 'Laura'],
+    'default_payer': None,
+    'split': {'Luc': 0.5, 'Laura': 0.5},
+    'income_weighted': False,
+    'categories': {},
+}
+# Persisted values besides the months, one row each
+STATE_KEYS = ('tag', 'files', 'watch', 'last_date', 'balance')
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settlement_months (
+    month TEXT PRIMARY KEY,
+    entry TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS settlement_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def load_settlement_config(path: Path) -> Dict:
+    """Settlement settings, with defaults for anything missing."""
+    config = dict(DEFAULT_CONFIG)
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    config['categories'] = {k.lower(): v for k, v in config['categories'].items()}
+    return config
+
+
+def settle_up(balances: Dict[str, float]) -> List[Tuple[str, str, float]]:
+    """Transfers (from, to, amount) that bring every balance to zero.
+
+    Greedy: the largest debtor pays the largest creditor, so n people need at
+    most n - 1 transfers.
+    """
+    debtors = sorted(((-b, p) for p, b in balances.items() if b < -0.005), reverse=True)
+    creditors = sorted(((b, p) for p, b in balances.items() if b > 0.005), reverse=True)
+    transfers = []
+    while debtors and creditors:
+        debt, debtor = debtors.pop(0)
+        credit, creditor = creditors.pop(0)
+        amount = min(debt, credit)
+        transfers.append((debtor, creditor, round(amount, 2)))
+        if debt - amount > 0.005:
+            debtors.insert(0, (debt - amount, debtor))
+        if credit - amount > 0.005:
+            creditors.insert(0, (credit - amount, creditor))
+    return transfers
+
+
+class Settlement:
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.config_file = self.base_dir / "budget" / "settlement.json"
+        self.income_file = self.base_dir / "budget" / "income.csv"
+        self.db_file = SummaryStore(self.base_dir).db_file
+        self.config = load_settlement_config(self.config_file)
+        self.members: List[str] = self.config['members']
+        self.income = load_income(self.income_file)
+        self._ratios: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self.state: Dict = {}
+        # Months changed since the state was last saved
+        self._dirty: Set[str] = set()
+
+    def _tag(self) -> str:
+        """Changes whenever balances computed so far would differ."""
+        income = self.income_file.stat() if self.income_file.exists() else None
+        key = json.dumps([self.config, income and [income.st_size, income.st_mtime_ns],
+                          default_converter().cache_tag()], sort_keys=True)
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _income_shares(self, month: str) -> Optional[Dict[str, float]]:
+        recurring = self.income[self.income['Date'].isna()]
+        dated = self.income[self.income['Date'].dt.strftime("%Y-%m") == month]
+        totals = pd.concat([recurring, dated]).groupby('Compte')['Montant'].sum()
+        shares = {m: float(totals.get(m, 0.0)) for m in self.members}
+        return shares if sum(shares.values()) > 0 else None
+
+    def ratios(self, category: str, month: str) -> Dict[str, float]:
+        """Share of each member in a shared expense of this category and month."""
+        key = (category.lower(), month)
+        if key not in self._ratios:
+            default = INCOME_SPLIT if self.config['income_weighted'] else self.config['split']
+            split = self.config['categories'].get(key[0], default)
+            if split == INCOME_SPLIT:
+                split = self._income_shares(month) or self.config['split']
+            total = sum(split.get(m, 0.0) for m in self.members)
+            self._ratios[key] = {m: split.get(m, 0.0) / total for m in self.members}
+        return self._ratios[key]
+
+    def _empty_state(self) -> Dict:
+        return {'tag': self._tag(), 'files': {}, 'watch': None, 'last_date': None,
+                'balance': {m: 0.0 for m in self.members}, 'months': {}}
+
+    def _add_row(self, day: str, category: str, amount: float, payer: Optional[str]):
+        """Fold one shared expense into the balances: O(members) when rows arrive in date order."""
+        month = day[:7]
+        entry = self.state['months'].setdefault(
+            month, {'spent': 0.0, 'paid': {}, 'unassigned': 0.0, 'balances': {}})
+        self._dirty.add(month)
+        entry['spent'] += amount
+        if payer not in self.members:
+            entry['unassigned'] += amount
+            return
+        entry['paid'][payer] = entry['paid'].get(payer, 0.0) + amount
+        delta = {m: -amount * r for m, r in self.ratios(category, month).items()}
+        delta[payer] += amount
+
+        balance = self.state['balance']
+        last_date = self.state['last_date']
+        if last_date is not None and day < last_date:
+            # Late row: shift every snapshot from that day on
+            if day not in entry['balances']:
+                entry['balances'][day] = self.balance_at(day)
+            for later_month, later in self.state['months'].items():
+                if later_month < month:
+                    continue
+                self._dirty.add(later_month)
+                for snapshot_day, snapshot in later['balances'].items():
+                    if snapshot_day >= day:
+                        for member, value in delta.items():
+                            snapshot[member] += value
+        for member, value in delta.items():
+            balance[member] += value
+        if last_date is None or day >= last_date:
+            entry['balances'][day] = dict(balance)
+            self.state['last_date'] = day
+
+    def add(self, rows: pd.DataFrame):
+        """Fold normalized expense rows in; rows of other accounts are ignored."""
+        if rows.empty:
+            return
+        shared = rows[rows['Compte'].astype(str).str.strip() == self.config['account']]
+        if shared.empty:
+            return
+        shared = shared.sort_values('Date', kind='stable')
+        payers = shared[PAYER] if PAYER in shared.columns else pd.Series(None, index=shared.index)
+        payers = payers.where(payers.notna() & (payers.astype(str).str.strip() != ''),
+                              self.config['default_payer'])
+        for when, category, amount, payer in zip(shared['Date'].dt.strftime("%Y-%m-%d"),
+                                                 shared['Categorie'].astype(str),
+                                                 shared['Montant'].to_numpy(dtype=float), payers):
+            self._add_row(when, category, float(amount), payer.strip() if isinstance(payer, str) else None)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_file.parent.mkdir(exist_ok=True)
+        connection = sqlite3.connect(self.db_file)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _load_state(self) -> Optional[Dict]:
+        with closing(self._connect()) as connection:
+            values = dict(connection.execute("SELECT key, value FROM settlement_state").fetchall())
+            if set(values) != set(STATE_KEYS):
+                return None
+            state = {key: json.loads(values[key]) for key in STATE_KEYS}
+            state['months'] = {month: json.loads(entry) for month, entry in
+                               connection.execute("SELECT month, entry FROM settlement_months")}
+        return state
+
+    def _save_state(self, full: bool = False):
+        """Write the scalar values and the months changed since the last save
+        (every month after a full recompute), in one transaction."""
+        months = self.state['months'] if full else self._dirty
+        with closing(self._connect()) as connection, connection:
+            if full:
+                connection.execute("DELETE FROM settlement_months")
+            connection.executemany("INSERT OR REPLACE INTO settlement_months VALUES (?, ?)",
+                                   [(month, json.dumps(self.state['months'][month])) for month in months])
+            connection.executemany("INSERT OR REPLACE INTO settlement_state VALUES (?, ?)",
+                                   [(key, json.dumps(self.state[key])) for key in STATE_KEYS])
+        self._dirty.clear()
+
+    def refresh(self) -> Dict:
+        """Bring the persisted balances up to date.
+
+        Rows appended to the working file are read from the last offset; any
+        other change (archived month, edited row, new settings) recomputes
+        everything once.
+        """
+        working = expenses_file(self.base_dir)
+        files = {str(p): [p.stat().st_size, p.stat().st_mtime_ns]
+                 for p in source_files(self.base_dir) if p != working}
+        watcher = ExpenseWatcher(working)
+
+        state = self._load_state()
+        if state is not None and state['tag'] == self._tag() and state['files'] == files and state['watch']:
+            self.state = state
+            watch = state['watch']
+            watcher.offset, watcher.inode, watcher.header = watch['offset'], watch['inode'], watch['header']
+            watcher.checksum = bytes.fromhex(watch['checksum'])
+            kind, rows = watcher.poll()
+            if kind != 'reload':
+                self.add(rows)
+                self._save_watch(watcher)
+                return self.state
+            watcher = ExpenseWatcher(working)
+
+        self.state = self._empty_state()
+        self.state['files'] = files
+        for chunk in iter_chunks([Path(p) for p in files]):
+            self.add(chunk)
+        _, rows = watcher.poll()
+        self.add(rows)
+        self._save_watch(watcher, full=True)
+        return self.state
+
+    def _save_watch(self, watcher: ExpenseWatcher, full: bool = False):
+        self.state['watch'] = {'offset': watcher.offset, 'inode': watcher.inode,
+                               'header': watcher.header, 'checksum': watcher.checksum.hex()}
+        self._save_state(full)
+
+    def balance_at(self, day: Optional[str] = None) -> Dict[str, float]:
+        """Balances at the end of a day (YYYY-MM-DD, default latest): positive means owed money."""
+        if day is None:
+            return dict(self.state['balance'])
+        months = sorted(self.state['months'])
+        index = bisect.bisect_right(months, day[:7])
+        while index > 0:
+            snapshots = self.state['months'][months[index - 1]]['balances']
+            days = [d for d in snapshots if d <= day]
+            if days:
+                return dict(snapshots[max(days)])
+            index -= 1
+        return {m: 0.0 for m in self.members}
+
+    def report(self, day: Optional[str] = None):
+        """Print balances, the transfers that settle them and the current month's shares."""
+        self.refresh()
+        balances = self.balance_at(day)
+        print(f"\n🤝 SETTLEMENT - {self.config['account']} account"
+              f"{f' as of {day}' if day else ''}")
+        print("="*50)
+        for member, balance in balances.items():
+            status = "is owed" if balance > 0.005 else "owes" if balance < -0.005 else "is even"
+            print(f"   👤 {member}: {status} €{abs(balance):.2f}")
+
+        transfers = settle_up(balances)
+        print("\n💸 Settle up:")
+        if not transfers:
+            print("   ✅ Nothing to settle.")
+        for debtor, creditor, amount in transfers:
+            print(f"   {debtor} → {creditor}: €{amount:.2f}")
+
+        month = (day or datetime.now().strftime("%Y-%m-%d"))[:7]
+        entry = self.state['months'].get(month)
+        if entry:
+            print(f"\n📅 {month}: €{entry['spent']:.2f} shared")
+            for member in self.members:
+                print(f"   {member} paid €{entry['paid'].get(member, 0.0):.2f}")
+        unassigned = sum(e['unassigned'] for m, e in self.state['months'].items() if not day or m <= month)
+        if unassigned > 0.005:
+            print(f"\n⚠️  €{unassigned:.2f} of shared expenses have no payer; add a '{PAYER}' column "
+                  f"or set default_payer in {self.config_file.name}.")
+
+
+def main():
+    day = sys.argv[1] if len(sys.argv) > 1 else \
+        input("Balance at date (YYYY-MM-DD) or leave empty for today: ").strip() or None
+    if day:
+        try:
+            day = pd.Timestamp(day).strftime("%Y-%m-%d")
+        except ValueError:
+            print("❌ Invalid date.")
+            return
+    Settlement().report(day)
+
+
+if __name__ == "__main__":
+    main()
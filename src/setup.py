@@ -61,7 +61,7 @@ def install_dependencies():
 def create_directories():
     """Create necessary directories."""
     directories = [
-        "Expenses",
+        "expenses",
         "History", 
         "Summary",
         "charts"
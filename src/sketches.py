@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Sketches
+Small mergeable summaries of the expense history: a KLL-style quantile sketch
+for transaction and daily amounts, and a Space-Saving top-k sketch of merchants
+(descriptions) by amount spent. Sketches are kept per account and month for
+every source file and refreshed only when that file changes, so percentiles,
+histograms and top merchants over years of data come from merging a few
+hundred numbers per month instead of scanning every row.
+
+Daily totals are not additive across files (one day can be split between the
+working file and a History file), so each file keeps its exact per-day totals
+instead, at most 31 numbers per account and month; a month's totals are summed
+across files into a small sketch of its own, and the month sketches are merged.
+"""
+
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fx_rates import default_converter
+from ledger import history_dir, read_expenses, source_files
+
+DEFAULT_K = 200
+DEFAULT_TOP_K = 50
+# Bumped whenever the layout of the per-file JSON changes
+SKETCH_FORMAT = 2
+
+
+class QuantileSketch:
+    """KLL-style quantile sketch: levels of sorted-and-halved samples, each item at level h weighing 2**h.
+
+    Count, sum, min and max are exact; quantiles have a rank error of about 1/k.
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._offset = 0
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) > self._capacity(h))
+            items = np.sort(self.levels[level])
+            keep = items[-1:] if len(items) % 2 else items[:0]
+            items = items[:len(items) - len(keep)]
+            # Alternate the kept half so errors do not pile up in one direction
+            promoted = items[self._offset::2]
+            self._offset ^= 1
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values: Iterable[float]) -> 'QuantileSketch':
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values):
+            self.count += len(values)
+            self.total += float(values.sum())
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def items(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Retained values and their weights, sorted by value."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float('nan')
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        values, weights = self.items()
+        cumulative = np.cumsum(weights)
+        return float(values[np.searchsorted(cumulative, q * cumulative[-1])])
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float('nan')
+
+    def sum_below(self, threshold: float) -> float:
+        """Estimated sum of the values under a threshold."""
+        values, weights = self.items()
+        below = values < threshold
+        return float((values[below] * weights[below]).sum())
+
+    def histogram(self, bins: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """Estimated (counts, edges) over [min, max]."""
+        values, weights = self.items()
+        if not len(values):
+            return np.zeros(bins), np.linspace(0, 1, bins + 1)
+        return np.histogram(values, bins=bins, range=(self.min, self.max), weights=weights)
+
+    def to_dict(self) -> Dict:
+        return {'k': self.k, 'count': self.count, 'sum': round(self.total, 2),
+                'min': self.min if self.count else None, 'max': self.max if self.count else None,
+                'levels': [np.round(items, 2).tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'QuantileSketch':
+        sketch = cls(data['k'])
+        sketch.levels = [np.array(items, dtype=float) for items in data['levels']] or [np.empty(0)]
+        sketch.count = data['count']
+        sketch.total = data['sum']
+        if sketch.count:
+            sketch.min, sketch.max = data['min'], data['max']
+        return sketch
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters weighted by amount: at most k merchants, each with an overestimate bound."""
+
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        self.k = k
+        # item -> [amount, error, transactions]
+        self.counters: Dict[str, List[float]] = {}
+
+    def update(self, item: str, amount: float, count: int = 1):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += amount
+            counter[2] += count
+        elif len(self.counters) < self.k:
+            self.counters[item] = [amount, 0.0, count]
+        else:
+            victim = min(self.counters, key=lambda i: self.counters[i][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[item] = [floor + amount, floor, count]
+
+    def update_many(self, items: pd.Series, amounts: pd.Series):
+        """Fold a batch in, pre-aggregated so each merchant is one update."""
+        grouped = amounts.groupby(items.to_numpy()).agg(['sum', 'size']).sort_values('sum', ascending=False)
+        for item, (amount, count) in zip(grouped.index, grouped.to_numpy()):
+            self.update(item, float(amount), int(count))
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Mergeable summary: a merchant missing from a full sketch may hold up to that sketch's minimum."""
+        floors = [min((c[0] for c in s.counters.values()), default=0.0) if len(s.counters) >= s.k else 0.0
+                  for s in (self, other)]
+        merged: Dict[str, List[float]] = {}
+        for item in set(self.counters) | set(other.counters):
+            amount, error, count = 0.0, 0.0, 0
+            for sketch, floor in zip((self, other), floors):
+                counter = sketch.counters.get(item)
+                if counter is None:
+                    amount, error = amount + floor, error + floor
+                else:
+                    amount, error, count = amount + counter[0], error + counter[1], count + counter[2]
+            merged[item] = [amount, error, count]
+        top = sorted(merged.items(), key=lambda entry: entry[1][0], reverse=True)[:self.k]
+        self.counters = dict(top)
+        return self
+
+    def top(self, n: int = 10) -> List[Tuple[str, float, int, float]]:
+        """(merchant, amount, transactions, error bound), largest first."""
+        ranked = sorted(self.counters.items(), key=lambda entry: entry[1][0], reverse=True)
+        return [(item, amount, int(count), error) for item, (amount, error, count) in ranked[:n]]
+
+    def to_dict(self) -> Dict:
+        return {'k': self.k, 'counters': {item: [round(c[0], 2), round(c[1], 2), int(c[2])]
+                                          for item, c in self.counters.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SpaceSaving':
+        sketch = cls(data['k'])
+        sketch.counters = {item: list(c) for item, c in data['counters'].items()}
+        return sketch
+
+
+class SketchStore:
+    """Per (source file, month, account) sketches in History/sketches/, one JSON file per source file."""
+
+    def __init__(self, base_dir: Optional[Path] = None, k: int = DEFAULT_K, top_k: int = DEFAULT_TOP_K):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.sketch_dir = history_dir(self.base_dir) / "sketches"
+        self.k = k
+        self.top_k = top_k
+
+    def _sketch_file(self, path: Path) -> Path:
+        return self.sketch_dir / f"{path.name}.json"
+
+    def _fingerprint(self, path: Path) -> List:
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns, default_converter().cache_tag(), self.k, self.top_k, SKETCH_FORMAT]
+
+    def build(self, df: pd.DataFrame) -> Dict[str, Dict]:
+        """Sketches of one file's rows: {month: {'first': ..., 'last': ..., 'accounts': {...}}}."""
+        months: Dict[str, Dict] = {}
+        if df.empty:
+            return months
+        days = df['Date'].dt.strftime("%Y-%m-%d")
+        merchants = df['Description'].astype(str).str.split().str.join(' ')
+        for month, rows in df.groupby(df['Date'].dt.strftime("%Y-%m")):
+            entry = {
+                'first': days[rows.index].min(),
+                'last': days[rows.index].max(),
+                'accounts': {},
+            }
+            for account, account_rows in rows.groupby('Compte'):
+                spent = account_rows[account_rows['Montant'] > 0]
+                top = SpaceSaving(self.top_k)
+                top.update_many(merchants[spent.index], spent['Montant'])
+                account_days = account_rows.groupby(days[account_rows.index])['Montant'].sum()
+                entry['accounts'][str(account)] = {
+                    'transactions': QuantileSketch(self.k).update(account_rows['Montant'].to_numpy()).to_dict(),
+                    'days': {day: float(amount) for day, amount in account_days.items()},
+                    'merchants': top.to_dict(),
+                }
+            months[month] = entry
+        return months
+
+    def refresh(self) -> Dict[str, Dict[str, Dict]]:
+        """Sketches of every source file, rebuilding those whose file changed."""
+        self.sketch_dir.mkdir(parents=True, exist_ok=True)
+        result = {}
+        for path in source_files(self.base_dir):
+            sketch_file = self._sketch_file(path)
+            fingerprint = self._fingerprint(path)
+            data = None
+            if sketch_file.exists():
+                try:
+                    with open(sketch_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except json.JSONDecodeError:
+                    data = None
+            if data is None or data.get('fingerprint') != fingerprint:
+                data = {'fingerprint': fingerprint, 'months': self.build(read_expenses(path))}
+                tmp_file = sketch_file.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_file, sketch_file)
+            result[path.name] = data['months']
+
+        # Sketches of files that were compacted or removed
+        for sketch_file in self.sketch_dir.glob("*.json"):
+            if sketch_file.name[:-len(".json")] not in result:
+                sketch_file.unlink()
+        return result
+
+    def merged(self, start: Optional[str] = None, end: Optional[str] = None,
+               accounts: Optional[List[str]] = None) -> Dict:
+        """Merge the sketches of months in [start, end] (YYYY-MM) for some or all accounts."""
+        transactions, daily, merchants = QuantileSketch(self.k), QuantileSketch(self.k), SpaceSaving(self.top_k)
+        days, max_day = 0, None
+        first, last = None, None
+        files = list(self.refresh().values())
+        for month in sorted({month for months in files for month in months}):
+            if (start and month < start) or (end and month > end):
+                continue
+            # A month's day totals, summed across the files that hold part of it
+            day_totals: Dict[str, float] = {}
+            for months in files:
+                entry = months.get(month)
+                if entry is None:
+                    continue
+                selected = {a: s for a, s in entry['accounts'].items() if accounts is None or a in accounts}
+                if not selected:
+                    continue
+                for sketches in selected.values():
+                    transactions.merge(QuantileSketch.from_dict(sketches['transactions']))
+                    merchants.merge(SpaceSaving.from_dict(sketches['merchants']))
+                    for day, amount in sketches['days'].items():
+                        day_totals[day] = day_totals.get(day, 0.0) + amount
+                first = min(first, entry['first']) if first else entry['first']
+                last = max(last, entry['last']) if last else entry['last']
+            if day_totals:
+                daily.merge(QuantileSketch(self.k).update(list(day_totals.values())))
+                days += len(day_totals)
+                day, amount = max(day_totals.items(), key=lambda item: item[1])
+                if max_day is None or round(amount, 2) > max_day[1]:
+                    max_day = [day, round(amount, 2)]
+        return {'transactions': transactions, 'daily': daily, 'merchants': merchants,
+                'days': days, 'first': first, 'last': last, 'max_day': max_day}
+
+def main():
+    store = SketchStore()
+    summary = store.merged()
+    transactions, daily = summary['transactions'], summary['daily']
+    if not transactions.count:
+        print("❌ No expenses to summarize.")
+        return
+    print(f"\n📐 {transactions.count:,} transactions over {summary['days']} days")
+    for label, sketch in (("Transaction", transactions), ("Daily total", daily)):
+        print(f"   {label}: P50 €{sketch.quantile(0.5):.2f} | P90 €{sketch.quantile(0.9):.2f} | "
+              f"P99 €{sketch.quantile(0.99):.2f} | max €{sketch.max:.2f}")
+    print("\n🏪 Top merchants:")
+    for merchant, amount, count, error in summary['merchants'].top(10):
+        print(f"   {merchant}: €{amount:.2f} ({count} transactions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Spend Forecast
+Monte Carlo projection of end-of-month spending: the rest of the month is
+simulated by bootstrapping historical days (same day of month, random past
+month) for every account and budget line at once, plus the fixed charges of
+initial_budget.json that history does not cover yet.
+"""
+
+import time
+from datetime import date, datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from budget_variance import budget_line_keys, load_budget_tree
+from ledger import ACCOUNTS, SUBCATEGORY
+from retention import RetentionManager
+
+DEFAULT_SIMULATIONS = 10_000
+DEFAULT_HISTORY_MONTHS = 12
+SHARED_ACCOUNT = 'Commun'
+MAX_DAYS = 31
+
+
+class SpendForecast:
+    def __init__(self,
+                 base_dir: Optional[Path] = None,
+                 simulations: int = DEFAULT_SIMULATIONS,
+                 history_months: int = DEFAULT_HISTORY_MONTHS,
+                 seed: Optional[int] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.budget = load_budget_tree(self.base_dir / "budget" / "initial_budget.json")
+        self.retention = RetentionManager(self.base_dir)
+        self.simulations = simulations
+        self.history_months = history_months
+        self.rng = np.random.default_rng(seed)
+
+    def _fixed_account(self, category: str) -> str:
+        """Personal budget categories (named after a configured account) belong to that account."""
+        for account in ACCOUNTS:
+            if account.lower() == category:
+                return account
+        return SHARED_ACCOUNT
+
+    def run(self, today: Optional[date] = None, daily: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+        """Simulate the rest of today's month.
+
+        Returns {'lines': ..., 'accounts': ...} with spent-to-date, fixed charges
+        still due, mean/P50/P90 projected totals and, for budgeted lines, the
+        probability of exceeding the planned amount.
+        """
+        today = pd.Timestamp(today or datetime.now().date())
+        month = today.to_period('M')
+        first_history = month - self.history_months
+        if daily is None:
+            daily = self.retention.daily_totals(start=first_history.start_time, end=today)
+        daily = daily[(daily['Date'] >= first_history.start_time) & (daily['Date'] <= today)]
+
+        # Series = (account, budget line) seen in the window
+        categories, subcategories = budget_line_keys(daily)
+        keys = pd.MultiIndex.from_arrays([daily['Compte'].astype(str), categories, subcategories])
+        series_codes, series = pd.factorize(keys)
+        series = pd.MultiIndex.from_tuples(series, names=['Compte', 'Categorie', SUBCATEGORY]) \
+            if len(series) else pd.MultiIndex.from_tuples([], names=['Compte', 'Categorie', SUBCATEGORY])
+        n_series = len(series)
+        amounts = daily['Montant'].to_numpy(dtype=float)
+        periods = daily['Date'].dt.to_period('M')
+
+        # Spent so far this month, per series
+        current = (periods == month).to_numpy()
+        spent = np.bincount(series_codes[current], weights=amounts[current], minlength=n_series)
+
+        # History cube: past month x day of month x series
+        past = ~current
+        dates = daily['Date'][past]
+        month_offsets = ((dates.dt.year * 12 + dates.dt.month).to_numpy()
+                         - (first_history.year * 12 + first_history.month)).astype(np.int64)
+        n_months = self.history_months
+        cube = np.zeros((n_months * MAX_DAYS, n_series))
+        np.add.at(cube, (month_offsets * MAX_DAYS + daily['Date'].dt.day.to_numpy()[past] - 1,
+                         series_codes[past]), amounts[past])
+        observed_months = np.unique(month_offsets)
+
+        # Bootstrap: for each remaining day, the same day of a random past month
+        remaining_days = np.arange(today.day, month.days_in_month)  # 0-based days after today
+        simulated = np.zeros((self.simulations, n_series))
+        if len(observed_months) and len(remaining_days) and n_series:
+            draws = observed_months[self.rng.integers(0, len(observed_months),
+                                                      size=(self.simulations, len(remaining_days)))]
+            cells = draws * MAX_DAYS + remaining_days
+            rows = np.repeat(np.arange(self.simulations), len(remaining_days))
+            counts = np.bincount(rows * (n_months * MAX_DAYS) + cells.ravel(),
+                                 minlength=self.simulations * n_months * MAX_DAYS)
+            simulated = counts.reshape(self.simulations, n_months * MAX_DAYS) @ cube
+
+        # Budget lines: planned lines plus lines seen in the data
+        planned = {(cat.lower(), sub.lower()): float(amount)
+                   for cat, subs in self.budget.items() for sub, amount in subs.items()}
+        line_keys = sorted(set(planned) | {(c, s) for _, c, s in series})
+        line_index = {key: i for i, key in enumerate(line_keys)}
+        membership = np.zeros((n_series, len(line_keys)))
+        for i, (_, category, subcategory) in enumerate(series):
+            membership[i, line_index[(category, subcategory)]] = 1.0
+        line_spent = spent @ membership
+        line_outcomes = simulated @ membership + line_spent
+
+        # Fixed charges with no history yet are assumed to be paid in full
+        history_by_line = np.bincount(series_codes[past], weights=amounts[past], minlength=n_series) @ membership
+        planned_vector = np.array([planned.get(key, 0.0) for key in line_keys])
+        fixed_due = np.where((planned_vector > 0) & (history_by_line == 0),
+                             np.maximum(planned_vector - line_spent, 0.0), 0.0)
+        line_outcomes += fixed_due
+
+        with np.errstate(invalid='ignore'):
+            exceed = np.where(planned_vector > 0, (line_outcomes > planned_vector + 0.005).mean(axis=0), np.nan)
+        lines = pd.DataFrame({
+            'Categorie': [c for c, _ in line_keys],
+            SUBCATEGORY: [s for _, s in line_keys],
+            'Planned': planned_vector,
+            'Spent': line_spent,
+            'Fixed due': fixed_due,
+            'Mean': line_outcomes.mean(axis=0),
+            'P50': np.percentile(line_outcomes, 50, axis=0),
+            'P90': np.percentile(line_outcomes, 90, axis=0),
+            'P(exceed)': exceed,
+        })
+
+        # Per account: simulated series plus fixed charges attributed to the account
+        accounts = sorted(set(series.get_level_values('Compte')) | set(ACCOUNTS))
+        account_index = {a: i for i, a in enumerate(accounts)}
+        account_membership = np.zeros((n_series, len(accounts)))
+        for i, account in enumerate(series.get_level_values('Compte')):
+            account_membership[i, account_index[account]] = 1.0
+        fixed_by_account = np.zeros(len(accounts))
+        for (category, _), due in zip(line_keys, fixed_due):
+            fixed_by_account[account_index[self._fixed_account(category)]] += due
+        account_outcomes = (simulated + spent) @ account_membership + fixed_by_account
+        account_table = pd.DataFrame({
+            'Compte': accounts,
+            'Spent': spent @ account_membership,
+            'Fixed due': fixed_by_account,
+            'Mean': account_outcomes.mean(axis=0),
+            'P50': np.percentile(account_outcomes, 50, axis=0),
+            'P90': np.percentile(account_outcomes, 90, axis=0),
+        })
+        return {'lines': lines, 'accounts': account_table}
+
+    def report(self, today: Optional[date] = None):
+        """Print the forecast for the current month."""
+        start = time.perf_counter()
+        daily = self.retention.daily_totals(
+            start=(pd.Timestamp(today or datetime.now().date()).to_period('M') - self.history_months).start_time)
+        loaded = time.perf_counter()
+        tables = self.run(today, daily)
+        elapsed = time.perf_counter() - loaded
+        month = pd.Timestamp(today or datetime.now().date()).strftime("%Y-%m")
+
+        print(f"\n🔮 END-OF-MONTH FORECAST - {month} ({self.simulations:,} simulations)")
+        print("="*60)
+        lines = tables['lines']
+        lines = lines[(lines['Planned'] > 0) | (lines['Mean'] > 0)]
+        for _, row in lines.sort_values('P(exceed)', ascending=False, na_position='last').iterrows():
+            risk = f"{row['P(exceed)'] * 100:5.1f}%" if not np.isnan(row['P(exceed)']) else "   n/a"
+            flag = "⚠️ " if not np.isnan(row['P(exceed)']) and row['P(exceed)'] >= 0.5 else "  "
+            print(f"{flag} {row['Categorie']:12} / {row[SUBCATEGORY]:15} budget €{row['Planned']:8.2f} | "
+                  f"P50 €{row['P50']:8.2f} | P90 €{row['P90']:8.2f} | over budget {risk}")
+
+        print("\n👥 Projected month total by account:")
+        for _, row in tables['accounts'].iterrows():
+            print(f"   👤 {row['Compte']}: spent €{row['Spent']:.2f} → P50 €{row['P50']:.2f}, P90 €{row['P90']:.2f}")
+        print(f"\n⏱️  Data loaded in {(loaded - start) * 1000:.0f} ms, simulated in {elapsed * 1000:.0f} ms")
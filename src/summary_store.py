@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Summary Store
+All monthly summaries in one SQLite table keyed by (month, account, category,
+sous-catégorie), instead of one small JSON or CSV file per account and month.
+Writers upsert a whole (account, month) at once; readers get any range of
+months in a single query. The per-file outputs are still available as an
+export.
+
+Usage:
+    python src/summary_store.py import    # load existing summary files
+    python src/summary_store.py export    # write per-file summaries from the store
+"""
+
+import json
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+ALL_ACCOUNTS = 'all'
+# Which tool wrote a row: BudgetTracker (budget tree lines) or ExpenseTracker (categories)
+SOURCES = ('budget', 'tracker')
+STORE_COLUMNS = ['Month', 'Compte', 'Categorie', 'Sous-categorie', 'Montant', 'Transactions', 'Source']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    month TEXT NOT NULL,
+    account TEXT NOT NULL,
+    category TEXT NOT NULL,
+    subcategory TEXT NOT NULL DEFAULT '',
+    amount REAL NOT NULL,
+    transactions INTEGER,
+    source TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    PRIMARY KEY (month, account, category, subcategory)
+) WITHOUT ROWID
+"""
+
+
+class SummaryStore:
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+        self.summary_dir = self.base_dir / "summary"
+        self.db_file = self.summary_dir / "summaries.sqlite"
+
+    def _connect(self) -> sqlite3.Connection:
+        self.summary_dir.mkdir(exist_ok=True)
+        connection = sqlite3.connect(self.db_file)
+        connection.execute(SCHEMA)
+        return connection
+
+    def replace_month(self, account: str, month: str, rows: Iterable[Dict], source: str) -> int:
+        """Upsert the summary of one account and month.
+
+        rows are dicts with Categorie, optional Sous-categorie, Montant and
+        optional Transactions. Lines this source wrote earlier for the same
+        account and month but no longer produces are removed, in the same
+        transaction.
+        """
+        if source not in SOURCES:
+            raise ValueError(f"Unknown summary source: {source}")
+        updated = datetime.now().isoformat(timespec='seconds')
+        values = [(month, account, str(row['Categorie']), str(row.get('Sous-categorie') or ''),
+                   float(row['Montant']),
+                   None if row.get('Transactions') is None else int(row['Transactions']),
+                   source, updated)
+                  for row in rows]
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM summaries WHERE month = ? AND account = ? AND source = ?",
+                               (month, account, source))
+            connection.executemany(
+                "INSERT INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (month, account, category, subcategory) DO UPDATE SET "
+                "amount = excluded.amount, transactions = excluded.transactions, "
+                "source = excluded.source, updated = excluded.updated",
+                values)
+        return len(values)
+
+    def read(self,
+             start: Optional[str] = None,
+             end: Optional[str] = None,
+             account: Optional[str] = None,
+             source: Optional[str] = None) -> pd.DataFrame:
+        """Summaries of months start..end (YYYY-MM, inclusive) in one query."""
+        if not self.db_file.exists():
+            return pd.DataFrame(columns=STORE_COLUMNS)
+        clauses, params = [], []
+        for clause, value in (("month >= ?", start), ("month <= ?", end),
+                              ("account = ?", account), ("source = ?", source)):
+            if value:
+                clauses.append(clause)
+                params.append(value)
+        query = ("SELECT month, account, category, subcategory, amount, transactions, source FROM summaries"
+                 + (" WHERE " + " AND ".join(clauses) if clauses else "")
+                 + " ORDER BY month, account, category, subcategory")
+        with closing(self._connect()) as connection:
+            rows = connection.execute(query, params).fetchall()
+        return pd.DataFrame(rows, columns=STORE_COLUMNS)
+
+    def budget_tree(self, account: str, month: str) -> Dict[str, Dict[str, float]]:
+        """A BudgetTracker summary back in its {category: {sous-catégorie: amount}} shape."""
+        df = self.read(month, month, account, source='budget')
+        tree: Dict[str, Dict[str, float]] = {}
+        for category, subcategory, amount in df[['Categorie', 'Sous-categorie', 'Montant']].itertuples(index=False):
+            tree.setdefault(category, {})[subcategory] = amount
+        return tree
+
+    def export_files(self, start: Optional[str] = None, end: Optional[str] = None,
+                     directory: Optional[Path] = None) -> List[Path]:
+        """Write the legacy per-file summaries: summary_{account}_{month}.json and
+        {Month_Year}_summary_{account}.csv."""
+        directory = Path(directory) if directory else self.summary_dir
+        directory.mkdir(parents=True, exist_ok=True)
+        written = []
+        df = self.read(start, end)
+        for (month, account, source), group in df.groupby(['Month', 'Compte', 'Source']):
+            if source == 'budget':
+                path = directory / f"summary_{account}_{month}.json"
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(self.budget_tree(account, month), f, indent=2, ensure_ascii=False)
+            else:
+                month_name = datetime.strptime(month + "-01", "%Y-%m-%d").strftime("%B_%Y")
+                path = directory / f"{month_name}_summary_{account.lower()}.csv"
+                group[['Month', 'Categorie', 'Montant']].to_csv(path, index=False)
+            written.append(path)
+        return written
+
+    def import_files(self, directories: Optional[List[Path]] = None) -> int:
+        """Load existing per-file summaries (empty ones are skipped); returns the lines stored."""
+        directories = directories or [self.summary_dir, self.base_dir / "Summary"]
+        stored = 0
+        for directory in directories:
+            if not directory.exists():
+                continue
+            for path in sorted(directory.glob("summary_*_*.json")):
+                account, month = path.stem[len("summary_"):].rsplit('_', 1)
+                with open(path, 'r', encoding='utf-8') as f:
+                    tree = json.load(f)
+                rows = [{'Categorie': c, 'Sous-categorie': s, 'Montant': a}
+                        for c, subs in tree.items() for s, a in subs.items()]
+                if rows:
+                    stored += self.replace_month(account, month, rows, 'budget')
+            for path in sorted(directory.glob("*_summary_*.csv")):
+                df = pd.read_csv(path)
+                if df.empty:
+                    continue
+                account = path.stem.rsplit('_summary_', 1)[1].capitalize()
+                for month, group in df.groupby('Month'):
+                    stored += self.replace_month(account, str(month), group.to_dict('records'), 'tracker')
+        return stored
+
+
+def main():
+    store = SummaryStore()
+    command = sys.argv[1] if len(sys.argv) > 1 else input("Command (import/export): ").strip().lower()
+    if command == 'import':
+        print(f"✅ {store.import_files()} summary lines stored in {store.db_file}")
+    elif command == 'export':
+        paths = store.export_files()
+        print(f"💾 {len(paths)} summary files written to {store.summary_dir}")
+    else:
+        print("Usage: python src/summary_store.py import|export")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The tools import each other by module name, as when run from src/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import parse_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_parse_cache(tmp_path, monkeypatch):
+    """Keep parsed frames out of the project's .cache directory."""
+    monkeypatch.setattr(parse_cache, '_default_cache', parse_cache.ParseCache(tmp_path / "parse_cache"))
@@ -0,0 +1,50 @@
+import builtins
+
+from expense_query import QueryEngine
+from ledger import expenses_file, history_dir
+
+HEADER = "Date,Compte,Categorie,Description,Montant\n"
+
+
+def write_expenses(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HEADER + "".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def make_copy(base):
+    # Named after the month it was archived in, holding December and January
+    write_expenses(history_dir(base) / "January_2024_expenses.csv", ["28/12/2023,Luc,Courses,pain,2.00",
+                                                                     "31/12/2023,Luc,Restaurant,diner,40.00",
+                                                                     "05/01/2024,Luc,Courses,marche,10.00"])
+    write_expenses(history_dir(base) / "June_2024_expenses.csv", ["10/06/2024,Laura,Transport,metro,1.90"])
+    write_expenses(expenses_file(base), ["01/10/2025,Commun,Maison,edf,40.00"])
+
+
+def test_pushdown_uses_the_dates_in_the_file(tmp_path):
+    make_copy(tmp_path)
+    engine = QueryEngine(tmp_path)
+
+    result = engine.run("date=2023-12 agg=sum")
+
+    assert result['Montant'].iloc[0] == 42.0
+    assert engine.last_stats['partitions_read'] == 1
+    assert engine.last_stats['partitions_total'] == 3
+
+
+def test_pruned_files_are_not_opened(tmp_path, monkeypatch):
+    make_copy(tmp_path)
+    QueryEngine(tmp_path).run("agg=sum")
+    opened = []
+    real_open = builtins.open
+
+    def recording_open(file, *args, **kwargs):
+        opened.append(str(file))
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', recording_open)
+    engine = QueryEngine(tmp_path)
+    result = engine.run("since=2025-10 agg=sum")
+
+    assert result['Montant'].iloc[0] == 40.0
+    assert engine.last_stats['partitions_read'] == 1
+    assert not [path for path in opened if path.startswith(str(history_dir(tmp_path)))]
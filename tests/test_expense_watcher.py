@@ -0,0 +1,80 @@
+import os
+import time
+
+from expense_watcher import QUIET_PERIOD, ExpenseWatcher
+
+HEADER = "Date,Compte,Categorie,Description,Montant\n"
+
+
+def write_expenses(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HEADER + "".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def settle(path):
+    """Backdate the last write so the file looks quiet."""
+    mtime = time.time() - QUIET_PERIOD - 1
+    os.utime(path, (mtime, mtime))
+
+
+def test_appended_rows_are_read_from_the_offset(tmp_path):
+    path = tmp_path / "expenses_working.csv"
+    write_expenses(path, ["01/10/2025,Luc,Courses,pain,2.00"])
+    watcher = ExpenseWatcher(path)
+    kind, rows = watcher.poll()
+    assert (kind, rows['Description'].tolist()) == ('reload', ['pain'])
+
+    append(path, "02/10/2025,Laura,Transport,metro,1.90\n")
+    kind, rows = watcher.poll()
+
+    assert (kind, rows['Description'].tolist()) == ('append', ['metro'])
+    assert watcher.offset == path.stat().st_size
+    assert watcher.poll()[0] == 'unchanged'
+
+
+def test_truncated_file_is_reloaded(tmp_path):
+    path = tmp_path / "expenses_working.csv"
+    write_expenses(path, ["01/10/2025,Luc,Courses,pain,2.00", "02/10/2025,Laura,Transport,metro,1.90"])
+    watcher = ExpenseWatcher(path)
+    watcher.poll()
+
+    # Archived and started again, with a shorter file in place
+    with open(path, 'r+', encoding='utf-8') as f:
+        f.truncate(len(HEADER))
+    append(path, "03/11/2025,Luc,Courses,marche,10.00\n")
+    kind, rows = watcher.poll()
+
+    assert (kind, rows['Description'].tolist()) == ('reload', ['marche'])
+    assert watcher.offset == path.stat().st_size
+
+
+def test_legacy_row_without_newline_waits_for_a_quiet_file(tmp_path):
+    path = tmp_path / "expenses_working.csv"
+    path.write_text(HEADER.rstrip("\n"), encoding="utf-8")
+    # The legacy adder writes the newline before the row
+    append(path, "\n01/10/2025,Luc,Courses,pain,2.00")
+    watcher = ExpenseWatcher(path)
+
+    kind, rows = watcher.poll()
+    assert (kind, rows.empty) == ('reload', True)
+    assert watcher.offset == len(HEADER)
+
+    settle(path)
+    kind, rows = watcher.poll()
+    assert (kind, rows['Description'].tolist()) == ('append', ['pain'])
+
+    # Only the leading newline of the next row has a line ending yet
+    append(path, "\n02/10/2025,Laura,Transport,metro,1.90")
+    assert watcher.poll()[0] == 'unchanged'
+    assert watcher.offset == path.stat().st_size - len("02/10/2025,Laura,Transport,metro,1.90")
+
+    settle(path)
+    kind, rows = watcher.poll()
+    assert (kind, rows['Description'].tolist()) == ('append', ['metro'])
+    assert rows['Montant'].tolist() == [1.9]
+    assert watcher.offset == path.stat().st_size
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from fx_rates import FxConverter
+from ledger import expenses_file, load_ledger
+
+
+def test_amounts_without_a_rate_are_left_out(tmp_path, capsys, monkeypatch):
+    rates_file = tmp_path / "fx_rates.csv"
+    rates_file.write_text("Date,Devise,Taux\n01/01/2025,USD,0.90\n", encoding="utf-8")
+    converter = FxConverter(rates_file)
+    df = pd.DataFrame({'Date': pd.to_datetime(['01/10/2025', '02/10/2025', '03/10/2025'], dayfirst=True),
+                       'Montant': [10.0, 20.0, 1000.0], 'Devise': ['', 'USD', 'JPY']})
+
+    converted = converter.convert(df)
+    converter.convert(df)
+
+    assert converted['Montant'].tolist() == [10.0, 18.0]
+    # Warned once, not on every chunk
+    assert capsys.readouterr().out.count("JPY") == 1
+
+    monkeypatch.setattr('fx_rates._default_converter', converter)
+    expenses_file(tmp_path).parent.mkdir(parents=True)
+    expenses_file(tmp_path).write_text("Date,Compte,Categorie,Description,Montant,Devise\n"
+                                       "01/10/2025,Luc,Courses,pain,2.00,\n"
+                                       "02/10/2025,Luc,Voyage,ramen,1000.00,JPY\n", encoding="utf-8")
+    assert load_ledger(tmp_path)['Montant'].sum() == 2.0
@@ -0,0 +1,96 @@
+import gzip
+
+import pandas as pd
+
+from ledger import archive_dir, expenses_file, history_dir, read_raw
+from replica_sync import LocalTransport, Replica, sync
+from retention import RetentionManager
+from settlement import Settlement
+
+HEADER = "Date,Compte,Categorie,Description,Montant\n"
+
+
+def write_expenses(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HEADER + "".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def descriptions(path):
+    return sorted(read_raw(path)['Description'])
+
+
+def test_push_and_pull_missing_rows(tmp_path):
+    local, remote = tmp_path / "local", tmp_path / "remote"
+    write_expenses(expenses_file(local), ["01/10/2025,Luc,Courses,pain,2.00",
+                                          "02/10/2025,Laura,Transport,metro,1.90"])
+    write_expenses(history_dir(local) / "September_2025_expenses.csv", ["15/09/2025,Commun,Maison,edf,40.00"])
+    write_expenses(expenses_file(remote), ["01/10/2025,Luc,Courses,pain,2.00",
+                                           "03/10/2025,Commun,Courses,marche,25.00"])
+
+    transport = LocalTransport(remote)
+    stats = sync(Replica(local), transport)
+
+    assert stats['pulled'] == 1
+    assert stats['pushed'] == 2
+    assert descriptions(expenses_file(local)) == ['marche', 'metro', 'pain']
+    assert descriptions(expenses_file(remote)) == ['marche', 'metro', 'pain']
+    # The September row goes to a History file of its month, not the working file
+    assert descriptions(history_dir(remote) / "September_2025_expenses.csv") == ['edf']
+    assert Replica(local).tree()['root'] == Replica(remote).tree()['root']
+    assert sync(Replica(local), LocalTransport(remote))['months_differing'] == 0
+
+
+def test_duplicate_rows_on_the_same_day_are_kept(tmp_path):
+    local, remote = tmp_path / "local", tmp_path / "remote"
+    coffee = "05/10/2025,Luc,Restaurant,cafe,1.50"
+    write_expenses(expenses_file(local), [coffee, coffee, coffee])
+    write_expenses(expenses_file(remote), [coffee])
+
+    stats = sync(Replica(local), LocalTransport(remote))
+
+    # Identical rows are told apart by their occurrence number
+    assert len(set(Replica(local).rows_state()['Hash'])) == 3
+    assert stats['pushed'] == 2
+    assert stats['pulled'] == 0
+    assert descriptions(expenses_file(remote)) == ['cafe', 'cafe', 'cafe']
+    assert descriptions(expenses_file(local)) == ['cafe', 'cafe', 'cafe']
+
+
+def test_merge_into_compacted_archive_rebuilds_rollups(tmp_path):
+    local, remote = tmp_path / "local", tmp_path / "remote"
+    for base in (local, remote):
+        write_expenses(history_dir(base) / "March_2023_expenses.csv", ["10/03/2023,Luc,Courses,pain,2.00"])
+        write_expenses(expenses_file(base), [])
+    write_expenses(history_dir(remote) / "March_2023_expenses.csv", ["10/03/2023,Luc,Courses,pain,2.00",
+                                                                     "11/03/2023,Luc,Courses,marche,30.00"])
+    assert RetentionManager(local).compact() == ['2023-03']
+
+    stats = sync(Replica(local), LocalTransport(remote))
+
+    assert stats['pulled'] == 1
+    archive = archive_dir(local) / "2023.csv.gz"
+    assert descriptions(archive) == ['marche', 'pain']
+    with gzip.open(archive, 'rt', encoding='utf-8') as f:
+        assert f.readline().startswith("Date,")
+    # No raw History file is recreated for the compacted month
+    assert not (history_dir(local) / "March_2023_expenses.csv").exists()
+    rollup = pd.read_csv(history_dir(local) / "rollups" / "2023_monthly.csv")
+    assert rollup['Montant'].sum() == 32.0
+    totals = RetentionManager(local).monthly_totals('2023-03', '2023-03')
+    assert totals['Montant'].sum() == 32.0
+
+
+def test_payer_is_synced_with_the_row(tmp_path):
+    local, remote = tmp_path / "local", tmp_path / "remote"
+    expenses_file(local).parent.mkdir(parents=True)
+    expenses_file(local).write_text("Date,Compte,Categorie,Description,Montant,Payeur\n"
+                                    "01/10/2025,Commun,Courses,marche,100.00,Laura\n", encoding="utf-8")
+    write_expenses(expenses_file(remote), ["02/10/2025,Luc,Courses,pain,2.00"])
+
+    sync(Replica(local), LocalTransport(remote))
+
+    rows = read_raw(expenses_file(remote))
+    assert rows.loc[rows['Description'] == 'marche', 'Payeur'].tolist() == ['Laura']
+    assert Settlement(local).refresh()['balance'] == Settlement(remote).refresh()['balance'] \
+        == {'Luc': -50.0, 'Laura': 50.0}
+    assert sync(Replica(local), LocalTransport(remote))['months_differing'] == 0
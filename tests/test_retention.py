@@ -0,0 +1,99 @@
+import builtins
+
+import pytest
+
+from ledger import archive_dir, expenses_file, history_dir, load_ledger, read_raw
+from retention import RetentionManager
+
+HEADER = "Date,Compte,Categorie,Description,Montant\n"
+
+
+def write_expenses(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HEADER + "".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def make_copy(base):
+    # Named after the month it was archived in, holding December and January
+    write_expenses(history_dir(base) / "January_2024_expenses.csv", ["28/12/2023,Luc,Courses,pain,2.00",
+                                                                     "05/01/2024,Luc,Courses,marche,10.00"])
+    write_expenses(history_dir(base) / "June_2024_expenses.csv", ["10/06/2024,Laura,Transport,metro,1.90"])
+    write_expenses(expenses_file(base), [])
+
+
+def test_compact_files_rows_under_their_own_year(tmp_path):
+    make_copy(tmp_path)
+
+    assert RetentionManager(tmp_path).compact() == ['2023-12', '2024-01', '2024-06']
+
+    assert sorted(read_raw(archive_dir(tmp_path) / "2023.csv.gz")['Description']) == ['pain']
+    assert sorted(read_raw(archive_dir(tmp_path) / "2024.csv.gz")['Description']) == ['marche', 'metro']
+    assert not list(history_dir(tmp_path).glob("*.csv"))
+    totals = RetentionManager(tmp_path).monthly_totals()
+    assert totals.groupby('Month')['Montant'].sum().to_dict() == {'2023-12': 2.0, '2024-01': 10.0, '2024-06': 1.9}
+
+
+def test_compact_resumes_after_an_interrupted_run(tmp_path, monkeypatch):
+    make_copy(tmp_path)
+    manager = RetentionManager(tmp_path)
+    build_rollups = manager._build_rollups
+    calls = []
+
+    def crash_after_first_archive(archive):
+        build_rollups(archive)
+        calls.append(archive)
+        if len(calls) == 1:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(manager, '_build_rollups', crash_after_first_archive)
+    with pytest.raises(KeyboardInterrupt):
+        manager.compact()
+    assert 'pending' in manager._load_manifest()
+
+    # The half-written archive is cut back, then everything is compacted once
+    RetentionManager(tmp_path).compact()
+
+    assert 'pending' not in RetentionManager(tmp_path)._load_manifest()
+    assert sorted(load_ledger(tmp_path)['Description']) == ['marche', 'metro', 'pain']
+
+
+def test_compact_finishes_when_files_were_partly_deleted(tmp_path, monkeypatch):
+    make_copy(tmp_path)
+    manager = RetentionManager(tmp_path)
+    save_manifest = manager._save_manifest
+
+    def crash_before_clearing_pending(manifest):
+        if 'pending' not in manifest and not list(history_dir(tmp_path).glob("*.csv")):
+            raise KeyboardInterrupt
+        save_manifest(manifest)
+
+    monkeypatch.setattr(manager, '_save_manifest', crash_before_clearing_pending)
+    with pytest.raises(KeyboardInterrupt):
+        manager.compact()
+    write_expenses(history_dir(tmp_path) / "June_2024_expenses.csv", ["10/06/2024,Laura,Transport,metro,1.90"])
+
+    # One file of the batch is gone, so the archives are complete: only clean up
+    assert RetentionManager(tmp_path).compact() == []
+
+    assert 'pending' not in RetentionManager(tmp_path)._load_manifest()
+    assert sorted(load_ledger(tmp_path)['Description']) == ['marche', 'metro', 'pain']
+
+
+def test_totals_only_open_files_in_range(tmp_path, monkeypatch):
+    make_copy(tmp_path)
+    write_expenses(history_dir(tmp_path) / "September_2026_expenses.csv", ["02/09/2026,Luc,Courses,pain,3.00"])
+    RetentionManager(tmp_path).compact()
+    RetentionManager(tmp_path).monthly_totals()
+    opened = []
+    real_open = builtins.open
+
+    def recording_open(file, *args, **kwargs):
+        opened.append(str(file))
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', recording_open)
+    totals = RetentionManager(tmp_path).monthly_totals('2026-09', '2026-09')
+
+    assert totals['Montant'].sum() == 3.0
+    # Neither the archives nor their rollups are read for a recent month
+    assert not [path for path in opened if path.endswith((".csv.gz", "_daily.csv", "_monthly.csv"))]
@@ -0,0 +1,75 @@
+import pytest
+
+import settlement
+from ledger import expenses_file
+from settlement import Settlement
+
+HEADER = "Date,Compte,Categorie,Description,Montant,Payeur\n"
+
+
+def write_expenses(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HEADER + "".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def append(path, line):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(line + "\n")
+
+
+def balances(base, days):
+    book = Settlement(base)
+    book.refresh()
+    return {day: book.balance_at(day) for day in days}
+
+
+DAYS = ['2025-09-30', '2025-10-01', '2025-10-03', '2025-10-05', None]
+
+
+def test_late_row_shifts_later_balances_only(tmp_path, monkeypatch):
+    working = expenses_file(tmp_path)
+    write_expenses(working, ["01/10/2025,Commun,Courses,marche,100.00,Laura",
+                             "05/10/2025,Commun,Maison,edf,40.00,Luc"])
+    assert balances(tmp_path, DAYS) == {
+        '2025-09-30': {'Luc': 0.0, 'Laura': 0.0},
+        '2025-10-01': {'Luc': -50.0, 'Laura': 50.0},
+        '2025-10-03': {'Luc': -50.0, 'Laura': 50.0},
+        '2025-10-05': {'Luc': -30.0, 'Laura': 30.0},
+        None: {'Luc': -30.0, 'Laura': 30.0},
+    }
+
+    # Rows dated before the latest one, in the same and in the previous month
+    append(working, "03/10/2025,Commun,Courses,pain,20.00,Luc")
+    append(working, "28/09/2025,Commun,Courses,fromage,20.00,Luc")
+
+    def no_full_recompute(paths):
+        raise AssertionError("appended rows should be folded in incrementally")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(settlement, 'iter_chunks', no_full_recompute)
+        incremental = balances(tmp_path, DAYS)
+    assert incremental == {
+        '2025-09-30': {'Luc': 10.0, 'Laura': -10.0},
+        '2025-10-01': {'Luc': -40.0, 'Laura': 40.0},
+        '2025-10-03': {'Luc': -30.0, 'Laura': 30.0},
+        '2025-10-05': {'Luc': -10.0, 'Laura': 10.0},
+        None: {'Luc': -10.0, 'Laura': 10.0},
+    }
+
+    # Same balances as computing everything from scratch
+    copy = tmp_path / "copy"
+    expenses_file(copy).parent.mkdir(parents=True)
+    expenses_file(copy).write_bytes(working.read_bytes())
+    assert balances(copy, DAYS) == incremental
+    # And as reading the persisted state back
+    assert balances(tmp_path, DAYS) == incremental
+
+
+def test_rewritten_file_is_recomputed(tmp_path):
+    working = expenses_file(tmp_path)
+    write_expenses(working, ["01/10/2025,Commun,Courses,marche,100.00,Laura"])
+    Settlement(tmp_path).refresh()
+
+    write_expenses(working, ["01/10/2025,Commun,Courses,marche,60.00,Laura"])
+
+    assert Settlement(tmp_path).refresh()['balance'] == pytest.approx({'Luc': -30.0, 'Laura': 30.0})
@@ -0,0 +1,25 @@
+from ledger import expenses_file, history_dir
+from sketches import SketchStore
+
+HEADER = "Date,Compte,Categorie,Description,Montant\n"
+
+
+def write_expenses(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HEADER + "".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def test_daily_totals_combine_a_day_split_across_files(tmp_path):
+    write_expenses(history_dir(tmp_path) / "October_2025_expenses.csv", ["30/09/2025,Luc,Courses,pain,2.00",
+                                                                         "01/10/2025,Luc,Courses,marche,10.00"])
+    write_expenses(expenses_file(tmp_path), ["01/10/2025,Laura,Restaurant,diner,40.00",
+                                             "02/10/2025,Luc,Transport,metro,1.90"])
+
+    summary = SketchStore(tmp_path).merged()
+
+    assert summary['days'] == 3
+    assert summary['max_day'] == ['2025-10-01', 50.0]
+    assert summary['daily'].count == 3
+    assert summary['daily'].total == 53.9
+    assert (summary['first'], summary['last']) == ('2025-09-30', '2025-10-02')
+    assert SketchStore(tmp_path).merged('2025-10', '2025-10', ['Luc'])['max_day'] == ['2025-10-01', 10.0]